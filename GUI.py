@@ -1,76 +1,180 @@
 from os import environ
 environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
-import pygame
-import os
 import time
-# os.environ['SDL_VIDEO_CENTERED'] = '1'
 
-class Grid:
-    def __init__(self, rows, cols, width, height, win, brd):
-        self.rows = rows
-        self.cols = cols
-        self.cubes = [[Cube(brd[i][j], i, j, width, height) for j in range(cols)] for i in range(rows)]
-        self.width = width
-        self.height = height
-        self.win = win
+import pygame
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+# numbers placed by the solver, to tell them apart from the givens
+BLUE = (30, 70, 200)
+# the room below the board for the solving time
+STATUS_HEIGHT = 60
+# thickness of the lines between cells and between blocks
+THIN = 1
+THICK = 4
+
+
+class Renderer:
+    """
+    Draws a sudoku in a pygame window that stays open between frames. The glyph of
+    every number is rendered once, changed cells are only marked dirty, and a frame
+    redraws and updates just the dirty cells, so a frame costs the same however many
+    steps led up to it.
+    """
+
+    def __init__(self, sudoku, block_width=3, size=540, caption="Sudoku"):
+        """
+        :param sudoku: the sudoku to show (2-d numpy array). Its non-zero numbers are
+        drawn as givens.
+        :param block_width: number of blocks in a row
+        :param size: the width of the board in pixels, rounded down to a whole number
+        of pixels per cell
+        """
+        pygame.display.init()
+        pygame.font.init()
+        self.grid_width = sudoku.shape[0]
+        self.block_width = block_width
+        self.cell = size // self.grid_width
+        self.size = self.cell * self.grid_width
+        self.window = pygame.display.set_mode((self.size, self.size + STATUS_HEIGHT))
+        pygame.display.set_caption(caption)
+        self.font = pygame.font.SysFont("comicsans", max(8, int(self.cell * 0.7)))
+        self.status_font = pygame.font.SysFont("comicsans", 40)
+        self.grid = sudoku.tolist()
+        self.givens = {
+            (row, col)
+            for row in range(self.grid_width)
+            for col in range(self.grid_width)
+            if self.grid[row][col]
+        }
+        self.glyphs = {
+            color: [None] + [
+                self.font.render(str(n), True, color)
+                for n in range(1, self.grid_width + 1)
+            ]
+            for color in (BLACK, BLUE)
+        }
+        self.dirty = set()
+        self.closed = False
+        # frames drawn by frame()
+        self.frames = 0
+        self.draw_board()
 
-    def draw(self):
-        # Draw Grid Lines
-        gap = self.width / 9
-        for i in range(self.rows + 1):
-            if i % 3 == 0 and i != 0:
-                thick = 4
-            else:
-                thick = 1
-            pygame.draw.line(self.win, (0, 0, 0), (0, i * gap), (self.width, i * gap), thick)
-            pygame.draw.line(self.win, (0, 0, 0), (i * gap, 0), (i * gap, self.height), thick)
+    def draw_board(self):
+        """
+        draws the whole board and shows it
+        """
+        self.window.fill(WHITE)
+        for i in range(self.grid_width + 1):
+            thick = THICK if i % self.block_width == 0 else THIN
+            offset = i * self.cell
+            pygame.draw.line(self.window, BLACK, (0, offset), (self.size, offset), thick)
+            pygame.draw.line(self.window, BLACK, (offset, 0), (offset, self.size), thick)
+        for row in range(self.grid_width):
+            for col in range(self.grid_width):
+                self.draw_cell(row, col)
+        self.dirty.clear()
+        pygame.display.flip()
 
-        # Draw Cubes
-        for i in range(self.rows):
-            for j in range(self.cols):
-                self.cubes[i][j].draw(self.win)
+    def draw_cell(self, row, col):
+        """
+        draws the inside of a cell, leaving the lines around it alone
+        :return: the rectangle drawn
+        """
+        inset = THICK // 2
+        rect = pygame.Rect(
+            col * self.cell + inset,
+            row * self.cell + inset,
+            self.cell - 2 * inset + 1,
+            self.cell - 2 * inset + 1,
+        )
+        self.window.fill(WHITE, rect)
+        n = self.grid[row][col]
+        if n:
+            color = BLACK if (row, col) in self.givens else BLUE
+            glyph = self.glyphs[color][n]
+            self.window.blit(glyph, glyph.get_rect(center=rect.center))
+        return rect
 
-class Cube:
-    def __init__(self, value, row, col, width, height):
-        self.value = value
-        self.temp = 0
-        self.row = row
-        self.col = col
-        self.width = width
-        self.height = height
+    def set(self, row, col, n):
+        """
+        puts n in a cell, 0 to empty it. It is drawn on the next frame.
+        """
+        self.grid[row][col] = n
+        self.dirty.add((row, col))
 
-    def draw(self, win):
-        fnt = pygame.font.SysFont("comicsans", 40)
-        gap = self.width / 9
-        x = self.col * gap
-        y = self.row * gap
+    def apply(self, step):
+        """
+        applies an (operation_type, row, col, n) step of a solving path
+        """
+        operation, row, col, n = step
+        self.set(row, col, n if operation == "ins" else 0)
 
-        if self.temp != 0 and self.value == 0:
-            text = fnt.render(str(self.temp), 1, (128,128,128))
-            win.blit(text, (x + 5, y + 5))
-        elif not(self.value == 0):
-            text = fnt.render(str(self.value), 1, (0, 0, 0))
-            win.blit(text, (x + (gap/2 - text.get_width()/2), y + (gap/2 - text.get_height()/2)))
+    def frame(self):
+        """
+        redraws the dirty cells and shows them
+        :return: False once the window has been closed
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.closed = True
+        if self.closed:
+            return False
+        rects = [self.draw_cell(row, col) for row, col in self.dirty]
+        self.dirty.clear()
+        pygame.display.update(rects)
+        self.frames += 1
+        return True
 
-def redraw_window(win, board, time):
-    win.fill((255,255,255))
-    board.draw()
+    def replay(self, path, fps=60, steps_per_second=None):
+        """
+        Replays a solving path, drawing at most fps frames a second. The steps taken
+        between two frames are all applied but only show up on the next one, so a
+        long path isn't slowed down by drawing every step.
+        :param path: the (operation_type, row, col, n) steps, such as a CompactPath
+        :param fps: the most frames drawn per second
+        :param steps_per_second: the pace of the replay, or None to replay as fast as
+        the steps can be applied
+        :return: False if the window was closed before the end of the path
+        """
+        frame_time = 1 / fps
+        start = time.monotonic()
+        next_frame = start
+        due = start
+        for i, step in enumerate(path):
+            self.apply(step)
+            if steps_per_second is not None:
+                due = start + (i + 1) / steps_per_second
+            # draw the frames that fall before the next step is due
+            while True:
+                now = time.monotonic()
+                if now >= next_frame:
+                    if not self.frame():
+                        return False
+                    next_frame = now + frame_time
+                if now >= due:
+                    break
+                time.sleep(max(0.0, min(next_frame, due) - now))
+        return self.frame()
 
-def print_gui(s):
-    win = pygame.display.set_mode((540,600))
-    board = Grid(s.shape[0], s.shape[0], 540, 540, win, s)
-    redraw_window(win, board, 0)
-    pygame.display.update()
-    return win
+    def write_time(self, text):
+        """
+        shows text below the board
+        """
+        rect = pygame.Rect(0, self.size + THICK, self.size, STATUS_HEIGHT - THICK)
+        self.window.fill(WHITE, rect)
+        label = self.status_font.render(text, True, BLACK)
+        self.window.blit(label, label.get_rect(midleft=(5, rect.centery)))
+        pygame.display.update(rect)
 
-def write_Time(win, time):
-    fnt = pygame.font.SysFont("comicsans", 40)
-    text = fnt.render("Solved in " + time, 1, (0,0,0))
-    win.blit(text, (5, 560))
-    pygame.display.update()    
+    def wait(self, seconds):
+        """
+        keeps the window responsive for a while, or until it is closed
+        """
+        end = time.monotonic() + seconds
+        while time.monotonic() < end and self.frame():
+            time.sleep(1 / 30)
 
-# pygame.font.init()
-def init_GUI():
-    pygame.font.init()
-    pygame.display.set_mode((540,600))
-    pygame.display.set_caption("Sudoku")
\ No newline at end of file
+    def close(self):
+        pygame.display.quit()
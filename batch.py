@@ -0,0 +1,209 @@
+"""
+Solves large numbers of sudokus across a pool of worker processes.
+Usage: python batch.py puzzles.txt [-w WORKERS] [--engine ENGINE] [--unordered]
+       [-o OUTPUT] [--format {line,grid,binary}]
+"""
+import argparse
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain, islice
+
+import numpy as np
+
+from puzzle_io import (
+    LAYOUTS,
+    close_stdout,
+    format_puzzle,
+    read_file,
+    write_binary,
+    write_puzzles,
+)
+from sudoku import ENGINES, solve_sudoku
+from vectorized import solve_batch
+
+# the solve_sudoku() engines, plus "vectorized" to solve each chunk at once with
+# vectorized.solve_batch()
+BATCH_ENGINES = ENGINES + ("vectorized",)
+# the engine of the command line tools, the fastest on 9x9 puzzles
+DEFAULT_ENGINE = "bitboard"
+# the formats solutions can be written in, see puzzle_io
+OUTPUT_FORMATS = ("line", "grid", "binary")
+# the default chunksize, larger for the vectorized engine which gets faster per
+# puzzle the more puzzles it propagates at once
+CHUNKSIZE = 64
+VECTORIZED_CHUNKSIZE = 1024
+
+
+def solve_many(
+    puzzles,
+    workers=None,
+    engine=DEFAULT_ENGINE,
+    ordered=True,
+    chunksize=None,
+    max_in_flight=None,
+):
+    """
+    Solves the puzzles in parallel. Puzzles are read lazily and sent to the workers in
+    chunks, and at most `max_in_flight` chunks are submitted but not yet handed back,
+    so memory stays bounded however long `puzzles` is.
+    :param puzzles: an iterable of sudokus (2-d numpy arrays), possibly of different
+    sizes. block_width is taken to be the square root of the grid width.
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :param engine: one of BATCH_ENGINES, the solve_sudoku() engine the workers use or
+    "vectorized"
+    :param ordered: if True the results come back in the order of `puzzles`,
+    otherwise as soon as they are ready
+    :param chunksize: number of puzzles sent to a worker at a time, defaults to
+    CHUNKSIZE, or VECTORIZED_CHUNKSIZE for the vectorized engine
+    :param max_in_flight: maximum number of chunks submitted at once, defaults to
+    twice the number of workers
+    :return: a generator of (index, completed_sudoku) tuples, where index is the
+    position of the puzzle in `puzzles` and completed_sudoku is None if it has no
+    solution.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    if chunksize is None:
+        chunksize = VECTORIZED_CHUNKSIZE if engine == "vectorized" else CHUNKSIZE
+    indexed = enumerate(puzzles)
+    chunks = iter(lambda: list(islice(indexed, chunksize)), [])
+    with ProcessPoolExecutor(workers) as executor:
+        in_flight = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    in_flight.append(executor.submit(_solve_chunk, chunk, engine))
+            if not in_flight:
+                return
+            if ordered:
+                future = in_flight.popleft()
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                in_flight.remove(future)
+            yield from future.result()
+
+
+def _solve_chunk(chunk, engine):
+    """
+    Runs in a worker process. Cover templates and the bitboard unit tables are cached
+    per process, so each worker only builds them once per geometry.
+    :return: the (index, completed_sudoku) of each puzzle in the chunk.
+    """
+    if engine == "vectorized":
+        return _solve_chunk_vectorized(chunk)
+    results = []
+    for index, sudoku in chunk:
+        grid_width = sudoku.shape[0]
+        completed_sudoku, _, _ = solve_sudoku(
+            sudoku,
+            grid_width=grid_width,
+            block_width=math.isqrt(grid_width),
+            engine=engine,
+        )
+        results.append((index, completed_sudoku))
+    return results
+
+
+def _solve_chunk_vectorized(chunk):
+    """
+    Runs in a worker process. Solves the puzzles of each size in the chunk together
+    with vectorized.solve_batch().
+    :return: the (index, completed_sudoku) of each puzzle in the chunk, in order.
+    """
+    by_size = {}
+    for position, (_, sudoku) in enumerate(chunk):
+        by_size.setdefault(sudoku.shape[0], []).append(position)
+    completed = [None] * len(chunk)
+    for grid_width, positions in by_size.items():
+        sudokus = np.stack([chunk[position][1] for position in positions])
+        completed_sudokus, solved, _ = solve_batch(
+            sudokus, grid_width, math.isqrt(grid_width)
+        )
+        for position, completed_sudoku, ok in zip(
+            positions, completed_sudokus, solved
+        ):
+            if ok:
+                completed[position] = completed_sudoku
+    return [(index, completed[position]) for position, (index, _) in enumerate(chunk)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", help="text or binary puzzle file, '-' for text on stdin")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--engine", choices=BATCH_ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="write solutions as they are found, prefixed by the puzzle's index",
+    )
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument(
+        "--layout", choices=LAYOUTS, default="auto", help="layout of a text file"
+    )
+    parser.add_argument("-o", "--output", default="-", help="'-' for stdout")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="line")
+    args = parser.parse_args()
+    if args.unordered and args.format != "line":
+        parser.error("--unordered writes lines")
+    if args.format == "binary" and args.output == "-":
+        parser.error("binary solutions need an --output file")
+    puzzles = read_file(args.file, args.layout)
+    first = next(puzzles, None)
+    if first is None:
+        return
+    results = solve_many(
+        chain([first], puzzles),
+        workers=args.workers,
+        engine=args.engine,
+        ordered=not args.unordered,
+        chunksize=args.chunksize,
+    )
+    if args.unordered:
+        output = sys.stdout if args.output == "-" else open(args.output, "w")
+        with output:
+            for index, completed_sudoku in results:
+                if completed_sudoku is None:
+                    line = "unsolvable"
+                else:
+                    line = format_puzzle(completed_sudoku)
+                print(f"{index}\t{line}", file=output)
+        return
+    solutions = (completed_sudoku for _, completed_sudoku in results)
+    write_solutions(solutions, args.output, args.format, first.shape[0])
+
+
+def write_solutions(solutions, output, output_format, grid_width):
+    """
+    Writes the solutions as they come, None for an unsolvable puzzle.
+    :param output: the file to write to, '-' for stdout
+    :param output_format: one of OUTPUT_FORMATS. Binary needs a file.
+    :param grid_width: the size of the solutions
+    """
+    if output_format == "binary":
+        with open(output, "wb") as file:
+            write_binary(solutions, file, grid_width=grid_width)
+    elif output == "-":
+        write_puzzles(solutions, sys.stdout, output_format)
+    else:
+        with open(output, "w") as file:
+            write_puzzles(solutions, file, output_format)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        # the reader of stdout has seen enough
+        close_stdout()
+        sys.exit(1)
@@ -0,0 +1,38 @@
+"""
+Throughput of solve_many() with an increasing number of worker processes.
+Run from the project directory with: python -m benchmarks.batch
+"""
+import argparse
+import os
+from itertools import cycle, islice
+from timeit import default_timer as timer
+
+from batch import solve_many
+from benchmarks.bitboard import HARD_17
+from puzzle_io import read_puzzles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--puzzles", type=int, default=2000)
+    parser.add_argument("--engine", default="bitboard")
+    parser.add_argument("--chunksize", type=int, default=64)
+    args = parser.parse_args()
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, cpus} | {w for w in (2, 4, 8, 16, 32) if w < cpus})
+    print(f"{'workers':>8}{'puzzles/s':>12}{'speedup':>10}")
+    base = None
+    for workers in worker_counts:
+        puzzles = read_puzzles(islice(cycle(HARD_17), args.puzzles))
+        start = timer()
+        for _ in solve_many(
+            puzzles, workers=workers, engine=args.engine, chunksize=args.chunksize
+        ):
+            pass
+        rate = args.puzzles / (timer() - start)
+        base = base or rate
+        print(f"{workers:>8}{rate:>12.1f}{rate / base:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
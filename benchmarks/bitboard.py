@@ -0,0 +1,51 @@
+"""
+Median solve time of the bitboard engine against the exact cover engines on 17-clue
+9x9 sudokus.
+Run from the project directory with: python -m benchmarks.bitboard
+"""
+import argparse
+import statistics
+
+import numpy as np
+
+from sudoku import solve_sudoku
+
+# minimal (17 clue) sudokus from Gordon Royle's collection
+HARD_17 = [
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "000000010400000000020000000000050604008000300001090000300400200050100000000807000",
+    "000000012000035000000600070700000300000400800100000000000120000080000040050000600",
+    "000000012003600000000007000410020000000500300700000600280000040000300500000000000",
+    "000000012008030000000000040120500000000004700060000000507000300000620000000100000",
+    "400000805030000000000700000020000060000080400000010000000603070500200000104000000",
+    "520006000000000701300000000000400800600000050000000000041800000000030020008700000",
+]
+
+
+def parse(line):
+    return np.array([int(n) for n in line]).reshape(9, 9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    sudokus = [parse(line) for line in HARD_17]
+    print(f"{'engine':<10}{'median (ms)':>14}{'worst (ms)':>14}")
+    for engine in ("bitboard", "dlx", "algx"):
+        # best of `repeat` runs for each sudoku, to take the noise out
+        times = [
+            min(
+                solve_sudoku(sudoku, engine=engine)[1]
+                for _ in range(args.repeat)
+            )
+            for sudoku in sudokus
+        ]
+        print(
+            f"{engine:<10}{statistics.median(times) * 1000:>14.3f}"
+            f"{max(times) * 1000:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Search nodes per second with live column counts against recounting the active rows
+at every node.
+Run from the project directory with: python -m benchmarks.colcounts
+"""
+import argparse
+from timeit import default_timer as timer
+
+import numpy as np
+
+from benchmarks.dlx import HARD_9
+from benchmarks.iterative import recursive_solve
+from cover import column_rows, create_cover
+from sudoku import solve
+from sudoku_para import solve_sudoku
+
+
+def nodes_per_second(solver, sudoku, grid_width, block_width):
+    cover, possibilities = create_cover(sudoku, grid_width, block_width)
+    n_cols = 4 * grid_width * grid_width
+    solution_path = []
+    start = timer()
+    solver(
+        cover,
+        column_rows(cover, n_cols),
+        np.ones(cover.shape[0], dtype=bool),
+        np.ones(n_cols, dtype=bool),
+        [],
+        solution_path,
+    )
+    elapsed = timer() - start
+    return sum(action for action, _ in solution_path) / elapsed
+
+
+def para_nodes_per_second(sudoku, grid_width, block_width):
+    """
+    :return: nodes/sec of sudoku_para.solve_sudoku on the NumPy backend
+    """
+    _, solving_time, solution_path = solve_sudoku(
+        sudoku, grid_width, block_width, path="compact"
+    )
+    return int(np.count_nonzero(solution_path.codes & 1)) / solving_time
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    cases = [
+        ("9x9 hard", HARD_9, 9, 3),
+        ("16x16 empty", np.zeros((16, 16), dtype=int), 16, 4),
+        ("25x25 empty", np.zeros((25, 25), dtype=int), 25, 5),
+    ]
+    print(f"{'case':<13}{'recount':>12}{'live':>12}{'para live':>12}  (nodes/s)")
+    for name, sudoku, grid_width, block_width in cases:
+        recount = nodes_per_second(recursive_solve, sudoku, grid_width, block_width)
+        live = nodes_per_second(solve, sudoku, grid_width, block_width)
+        para = para_nodes_per_second(sudoku, grid_width, block_width)
+        print(f"{name:<13}{recount:>12.0f}{live:>12.0f}{para:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
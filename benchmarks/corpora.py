@@ -0,0 +1,67 @@
+"""
+The fixed puzzle sets the benchmark suite runs on. Every 9x9 puzzle has a unique
+solution. The larger grids are generated from a seed, so they are the same on every
+run and machine.
+"""
+import numpy as np
+
+from benchmarks.bitboard import HARD_17, parse
+from benchmarks.dlx import HARD_9
+
+# the first grids of Project Euler problem 96
+EASY_9 = [
+    "003020600900305001001806400008102900700000008006708200002609500800203009005010300",
+    "200080300060070084030500209000105408000000000402706000301007040720040060004010003",
+    "000000907000420180000705026100904000050000040000507009920108000034059000507000000",
+    "030050040008010500460000012070502080000603000040109030250000098001020600080060020",
+]
+
+# Easter Monster, Golden Nugget, Platinum Blonde and AI Escargot
+HARD_9_EXTRA = [
+    "100000002090400050006000700050903000000070000000850040700000600030009080002000001",
+    "000000039000001005003050800008090006070002000100400000009080050020000600400700000",
+    "000000012000000003002300400001800005060070800000009000008500000900040500470006000",
+    "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+]
+
+
+def generated(grid_width, block_width, clue_fraction, seed):
+    """
+    Shuffles a patterned solution by permuting its digits, the rows within each band,
+    the bands, the columns within each stack and the stacks, then keeps a random
+    `clue_fraction` of its cells as clues. The result can have several solutions.
+    :return: the sudoku (2-d numpy array)
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = np.indices((grid_width, grid_width))
+    solution = (block_width * (rows % block_width) + rows // block_width + cols)
+    solution = rng.permutation(grid_width)[solution % grid_width] + 1
+
+    def line_order():
+        # keeps every line in its band (or stack) so the blocks stay valid
+        bands = rng.permutation(block_width)
+        return np.concatenate(
+            [band * block_width + rng.permutation(block_width) for band in bands]
+        )
+
+    solution = solution[line_order()][:, line_order()]
+    hidden = rng.random((grid_width, grid_width)) >= clue_fraction
+    solution[hidden] = 0
+    return solution
+
+
+def corpora():
+    """
+    :return: a dict mapping the name of each corpus to a (grid_width, block_width,
+    sudokus) tuple
+    """
+    return {
+        "easy-9": (9, 3, [parse(line) for line in EASY_9]),
+        "hard-9": (9, 3, [HARD_9] + [parse(line) for line in HARD_9_EXTRA]),
+        "17-clue-9": (9, 3, [parse(line) for line in HARD_17]),
+        "16": (16, 4, [generated(16, 4, 0.45, seed) for seed in range(3)]),
+        # randomly hidden cells quickly make large grids very hard, so they keep more
+        # clues
+        "25": (25, 5, [generated(25, 5, 0.6, 0), generated(25, 5, 0.5, 1)]),
+        "36": (36, 6, [generated(36, 6, 0.6, seed) for seed in range(2)]),
+    }
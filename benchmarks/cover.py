@@ -0,0 +1,64 @@
+"""
+Reports the build time and peak memory of create_cover for 9x9 through 64x64 grids,
+next to the size the cover would have as a dense float64 matrix or as one packed
+uint64 bitset over the columns per row.
+Run from the project directory with: python -m benchmarks.cover
+"""
+import argparse
+import tracemalloc
+from timeit import default_timer as timer
+
+import numpy as np
+
+from cover import column_rows, cover_template, create_cover
+
+GEOMETRIES = [(9, 3), (16, 4), (25, 5), (36, 6), (49, 7), (64, 8)]
+
+
+def bench(grid_width, block_width, repeat):
+    """
+    :return: a (best build time, peak traced bytes, cover bytes) tuple for the empty
+    grid, which has the most possibilities. The build includes the column to rows lookup and,
+    since the template cache is cleared first, building the geometry's template.
+    """
+    sudoku = np.zeros((grid_width, grid_width), dtype=int)
+    best = float("inf")
+    for _ in range(repeat):
+        cover_template.cache_clear()
+        start = timer()
+        cover, possibilities = create_cover(sudoku, grid_width, block_width)
+        column_rows(cover, 4 * grid_width * grid_width)
+        best = min(best, timer() - start)
+    cover_template.cache_clear()
+    tracemalloc.start()
+    cover, possibilities = create_cover(sudoku, grid_width, block_width)
+    indptr, indices = column_rows(cover, 4 * grid_width * grid_width)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = cover.nbytes + possibilities.nbytes + indptr.nbytes + indices.nbytes
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(
+        f"{'grid':<8}{'rows':>10}{'build (ms)':>12}{'peak (MB)':>12}"
+        f"{'kept (MB)':>12}{'dense f64 (MB)':>16}{'bitset (MB)':>13}"
+    )
+    for grid_width, block_width in GEOMETRIES:
+        build, peak, size = bench(grid_width, block_width, args.repeat)
+        n_rows = grid_width ** 3
+        n_cols = 4 * grid_width * grid_width
+        dense = n_rows * n_cols * 8
+        bitset = n_rows * -(-n_cols // 64) * 8
+        print(
+            f"{f'{grid_width}x{grid_width}':<8}{n_rows:>10}{build * 1000:>12.2f}"
+            f"{peak / 2 ** 20:>12.2f}{size / 2 ** 20:>12.2f}{dense / 2 ** 20:>16.0f}"
+            f"{bitset / 2 ** 20:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
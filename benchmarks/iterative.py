@@ -0,0 +1,103 @@
+"""
+Compares the iterative algorithm-x solver with the recursive one it replaced: solve
+time, search nodes and the memory held by the search per level of the tree.
+Run from the project directory with: python -m benchmarks.iterative
+"""
+import argparse
+import tracemalloc
+from timeit import default_timer as timer
+
+import numpy as np
+
+from benchmarks.dlx import HARD_9
+from cover import column_rows, create_cover
+from sudoku import col_counts, solve
+
+
+def recursive_solve(cover, col_rows, active_rows, active_cols, solution, solution_path):
+    """
+    The recursive algorithm-x solver, kept as the baseline: every level allocates the
+    arrays of rows and columns it removed and holds them until it returns.
+    """
+    if not active_cols.any():
+        return True
+    active_col_indices = np.flatnonzero(active_cols)
+    counts = col_counts(cover, active_rows, active_cols.shape[0])
+    col = active_col_indices[int(np.argmin(counts[active_col_indices]))]
+    if counts[col] == 0:
+        return False
+    indptr, indices = col_rows
+    candidate_rows = indices[indptr[col]:indptr[col + 1]]
+    for row in candidate_rows[active_rows[candidate_rows]]:
+        solution.append(row)
+        solution_path.append((1, row))
+        columns_to_remove = cover[row][active_cols[cover[row]]]
+        rows_to_remove = np.concatenate(
+            [indices[indptr[c]:indptr[c + 1]] for c in columns_to_remove]
+        )
+        rows_to_remove = np.unique(rows_to_remove[active_rows[rows_to_remove]])
+        active_rows[rows_to_remove] = False
+        active_cols[columns_to_remove] = False
+        if recursive_solve(
+            cover, col_rows, active_rows, active_cols, solution, solution_path
+        ):
+            return True
+        solution.pop()
+        solution_path.append((0, row))
+        active_rows[rows_to_remove] = True
+        active_cols[columns_to_remove] = True
+    return False
+
+
+def bench(solver, sudoku, grid_width, block_width):
+    """
+    :return: a (time, nodes, max depth, peak traced bytes) tuple, or None if the solver
+    hit the recursion limit.
+    """
+    cover, possibilities = create_cover(sudoku, grid_width, block_width)
+    n_cols = 4 * grid_width * grid_width
+    col_rows = column_rows(cover, n_cols)
+    active_rows = np.ones(cover.shape[0], dtype=bool)
+    active_cols = np.ones(n_cols, dtype=bool)
+    solution, solution_path = [], []
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = timer()
+    try:
+        solver(cover, col_rows, active_rows, active_cols, solution, solution_path)
+    except RecursionError:
+        return None
+    finally:
+        elapsed = timer() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    nodes = sum(action for action, _ in solution_path)
+    return elapsed, nodes, len(solution), peak - baseline
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    cases = [
+        ("9x9 hard", HARD_9, 9, 3),
+        ("25x25 empty", np.zeros((25, 25), dtype=int), 25, 5),
+        ("36x36 empty", np.zeros((36, 36), dtype=int), 36, 6),
+    ]
+    print(
+        f"{'case':<13}{'solver':<11}{'time (s)':>10}{'nodes':>8}"
+        f"{'peak (KiB)':>12}{'bytes/level':>13}"
+    )
+    for name, sudoku, grid_width, block_width in cases:
+        for label, solver in (("recursive", recursive_solve), ("iterative", solve)):
+            result = bench(solver, sudoku, grid_width, block_width)
+            if result is None:
+                print(f"{name:<13}{label:<11}{'recursion limit exceeded':>43}")
+                continue
+            elapsed, nodes, depth, peak = result
+            print(
+                f"{name:<13}{label:<11}{elapsed:>10.3f}{nodes:>8}"
+                f"{peak / 1024:>12.1f}{peak / depth:>13.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Open-loop load test of the solving service (service.py): sends POST /solve requests at
+a fixed rate, whether or not the earlier ones were answered, and reports the latency
+and throughput it got along with the service's own /metrics.
+Run from the project directory with: python -m benchmarks.loadtest --start-server
+"""
+import argparse
+import asyncio
+import json
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.corpora import corpora
+
+
+async def post(host, port, path, payload=None):
+    """
+    sends one request on a new connection
+    :return: a (status, decoded JSON body) tuple
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        method = "GET" if payload is None else "POST"
+        writer.write(
+            (
+                f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            ).encode()
+            + body
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+async def run(args, puzzles):
+    latencies = []
+    statuses = Counter()
+    errors = Counter()
+
+    async def request(batch):
+        start = time.monotonic()
+        try:
+            status, body = await post(args.host, args.port, "/solve", batch)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+            errors[type(error).__name__] += 1
+            return
+        if status != 200:
+            errors[f"HTTP {status}"] += 1
+            return
+        latencies.append(time.monotonic() - start)
+        results = body["results"] if "results" in body else [body]
+        statuses.update(result["status"] for result in results)
+
+    tasks = []
+    sent = 0
+    start = time.monotonic()
+    while time.monotonic() - start < args.duration:
+        if args.batch == 1:
+            batch = {"puzzle": puzzles[sent % len(puzzles)]}
+        else:
+            batch = {
+                "puzzles": [
+                    puzzles[(sent * args.batch + i) % len(puzzles)]
+                    for i in range(args.batch)
+                ]
+            }
+        tasks.append(asyncio.create_task(request(batch)))
+        sent += 1
+        # keep to the schedule rather than to the time since the last request
+        await asyncio.sleep(max(0.0, start + sent / args.qps - time.monotonic()))
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - start
+    print(f"requests sent: {sent}, answered: {len(latencies)}, in {elapsed:.2f}s")
+    print(f"achieved: {len(latencies) / elapsed:.1f} requests/s, "
+          f"{sum(statuses.values()) / elapsed:.1f} puzzles/s")
+    if latencies:
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"latency (ms): p50 {p50:.1f}, p99 {p99:.1f}, "
+              f"max {max(latencies) * 1000:.1f}")
+    print(f"puzzles: {dict(statuses)}")
+    if errors:
+        print(f"errors: {dict(errors)}")
+    _, metrics = await post(args.host, args.port, "/metrics")
+    print(f"service metrics: {json.dumps(metrics, indent=2)}")
+
+
+def start_server(args):
+    """
+    starts service.py on the port and waits until it accepts connections
+    """
+    server = subprocess.Popen(
+        [sys.executable, "service.py", "--port", str(args.port)]
+        + (["--workers", str(args.workers)] if args.workers else [])
+    )
+    for _ in range(200):
+        try:
+            asyncio.run(post(args.host, args.port, "/metrics"))
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("the service didn't start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--qps", type=float, default=100, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--batch", type=int, default=1, help="puzzles per request")
+    parser.add_argument("--corpus", choices=sorted(corpora()), default="17-clue-9")
+    parser.add_argument(
+        "--start-server", action="store_true", help="run service.py for the test"
+    )
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    args = parser.parse_args()
+    puzzles = [sudoku.tolist() for sudoku in corpora()[args.corpus][2]]
+    server = start_server(args) if args.start_server else None
+    try:
+        asyncio.run(run(args, puzzles))
+    finally:
+        if server is not None:
+            # lets the service shut its worker processes down
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares algorithm-x in sudoku.py with the array backend version in sudoku_para.py,
+on NumPy and, if it is installed, on CuPy.
+Run from the project directory with: python -m benchmarks.para
+"""
+import argparse
+from timeit import default_timer as timer
+
+import numpy as np
+
+import sudoku_para
+from benchmarks.dlx import CASES
+from cover import column_rows, create_cover
+from sudoku import solve
+
+
+def bench_algx(cover, n_cols):
+    start = timer()
+    solved = solve(
+        cover,
+        column_rows(cover, n_cols),
+        np.ones(cover.shape[0], dtype=bool),
+        np.ones(n_cols, dtype=bool),
+        [],
+        None,
+    )
+    assert solved
+    return timer() - start
+
+
+def bench_para(cover, n_cols, xp):
+    start = timer()
+    assert sudoku_para.solve_cover(xp, cover, n_cols, [], None)
+    return timer() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    backends = {}
+    for backend in sudoku_para.BACKENDS:
+        try:
+            backends[backend] = sudoku_para.array_module(backend)
+        except ImportError:
+            pass
+    print(f"{'case':<14}{'solver':<14}{'solve (s)':>12}")
+    for name, sudoku, grid_width, block_width in CASES:
+        cover, _ = create_cover(sudoku, grid_width, block_width)
+        n_cols = 4 * grid_width * grid_width
+        best = min(bench_algx(cover, n_cols) for _ in range(args.repeat))
+        print(f"{name:<14}{'sudoku':<14}{best:>12.4f}")
+        for backend, xp in backends.items():
+            best = min(bench_para(cover, n_cols, xp) for _ in range(args.repeat))
+            print(f"{name:<14}{'para/' + backend:<14}{best:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
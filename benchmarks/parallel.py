@@ -0,0 +1,62 @@
+"""
+Wall time of the parallel algorithm-x solver against the number of workers, on the
+empty 36x36 grid and on counting the first solutions of a 9x9 sudoku with too few
+clues to be unique. Speedups need as many idle cores as workers.
+Run from the project directory with: python -m benchmarks.parallel
+"""
+import argparse
+import os
+from timeit import default_timer as timer
+
+import numpy as np
+
+from benchmarks.bitboard import HARD_17, parse
+from parallel import count_solutions_parallel, solve_parallel
+
+
+def ambiguous_sudoku():
+    """
+    :return: the first 17-clue sudoku with its first two clues removed
+    """
+    sudoku = parse(HARD_17[0])
+    row, col = (sudoku != 0).nonzero()
+    sudoku[row[:2], col[:2]] = 0
+    return sudoku
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--split-factor", type=int, default=8)
+    parser.add_argument(
+        "--limit", type=int, default=1000, help="solutions counted in the 9x9 case"
+    )
+    args = parser.parse_args()
+    empty = np.zeros((36, 36), dtype=int)
+    ambiguous = ambiguous_sudoku()
+    workers = 1
+    print(f"{'workers':<10}{'36x36 solve (s)':>18}{'9x9 count (s)':>16}")
+    while workers <= args.max_workers:
+        best_solve = best_count = float("inf")
+        for _ in range(args.repeat):
+            completed, solving_time, _ = solve_parallel(
+                empty, 36, 6, workers=workers, split_factor=args.split_factor
+            )
+            assert completed is not None
+            best_solve = min(best_solve, solving_time)
+            start = timer()
+            count = count_solutions_parallel(
+                ambiguous,
+                limit=args.limit,
+                workers=workers,
+                split_factor=args.split_factor,
+            )
+            best_count = min(best_count, timer() - start)
+            assert count == args.limit
+        print(f"{workers:<10}{best_solve:>18.3f}{best_count:>16.3f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Solve time and peak memory with the solving path off, compact and streamed, against
+the list of (operation_type, row, col, n) tuples the solvers used to build.
+Run from the project directory with: python -m benchmarks.recording
+"""
+import argparse
+import tracemalloc
+from timeit import default_timer as timer
+
+import numpy as np
+
+import dlx
+from benchmarks.dlx import HARD_9
+from cover import create_cover
+from recording import OPERATIONS, path_recorder
+
+
+def tuple_path(possibilities, solution_path):
+    """
+    :return: the steps as a list of (operation_type, row, col, n) tuples, the way the
+    path used to be returned.
+    """
+    steps = []
+    for action, cover_row in solution_path:
+        row, col, n = possibilities[cover_row].item()
+        steps.append((OPERATIONS[action], row, col, n))
+    return steps
+
+
+def bench(sudoku, grid_width, block_width, path):
+    """
+    :return: the (time, peak traced bytes, steps) of a dlx solve that records its path
+    as `path`, which is either a path argument of solve_sudoku() or "tuples".
+    """
+    cover, possibilities = create_cover(sudoku, grid_width, block_width)
+    links = dlx.build_links(cover, 4 * grid_width * grid_width)
+    steps = [0]
+
+    def count(operation_type, row, col, n):
+        steps[0] += 1
+
+    tracemalloc.start()
+    start = timer()
+    if path == "tuples":
+        solution_path = []
+        dlx.solve(links, [], solution_path)
+        solution_path = tuple_path(possibilities, solution_path)
+        steps[0] = len(solution_path)
+    else:
+        recorder = path_recorder(count if path == "stream" else path, possibilities)
+        dlx.solve(links, [], recorder)
+        if path == "compact":
+            steps[0] = len(recorder)
+    elapsed = timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, steps[0]
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    cases = [
+        ("9x9 hard", HARD_9, 9, 3),
+        ("25x25 empty", np.zeros((25, 25), dtype=int), 25, 5),
+    ]
+    print(f"{'case':<13}{'path':<9}{'time (s)':>10}{'peak (KiB)':>12}{'steps':>8}")
+    for name, sudoku, grid_width, block_width in cases:
+        for path in ("tuples", "off", "compact", "stream"):
+            elapsed, peak, steps = bench(sudoku, grid_width, block_width, path)
+            steps = "" if path == "off" else steps
+            print(
+                f"{name:<13}{path:<9}{elapsed:>10.3f}{peak / 1024:>12.1f}{steps:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
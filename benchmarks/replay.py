@@ -0,0 +1,53 @@
+"""
+Time the GUI takes to replay a long solving path on a 25x25 grid, at a target frame
+rate, with the steps between frames applied but not drawn. Uses SDL's dummy video
+driver unless SDL_VIDEODRIVER is set, so it runs without a display.
+Run from the project directory with: python -m benchmarks.replay
+"""
+import argparse
+import os
+from timeit import default_timer as timer
+
+import numpy as np
+
+from benchmarks.corpora import generated
+
+
+def random_path(sudoku, n_steps, seed=0):
+    """
+    :return: n_steps (operation_type, row, col, n) steps that fill and empty random
+    empty cells of the sudoku, like a search backtracking a lot
+    """
+    rng = np.random.default_rng(seed)
+    grid_width = sudoku.shape[0]
+    rows, cols = (sudoku == 0).nonzero()
+    cells = rng.integers(0, rows.shape[0], n_steps // 2)
+    numbers = rng.integers(1, grid_width + 1, n_steps // 2)
+    path = []
+    for cell, n in zip(cells.tolist(), numbers.tolist()):
+        path.append(("ins", int(rows[cell]), int(cols[cell]), n))
+        path.append(("rem", int(rows[cell]), int(cols[cell]), n))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--fps", type=float, default=60)
+    args = parser.parse_args()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from GUI import Renderer
+
+    sudoku = generated(25, 5, 0.5, 1)
+    path = random_path(sudoku, args.steps)
+    renderer = Renderer(sudoku, block_width=5)
+    start = timer()
+    renderer.replay(path, fps=args.fps)
+    elapsed = timer() - start
+    renderer.close()
+    print(f"{len(path)} steps in {elapsed:.2f}s, {renderer.frames} frames, "
+          f"{len(path) / elapsed:.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
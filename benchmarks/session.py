@@ -0,0 +1,73 @@
+"""
+Latency of an edit in an interactive app: placing a number, then checking the sudoku
+is still consistent and asking for a hint. A SolverSession keeps its cover between
+edits; the baseline calls solve_sudoku() from scratch after every edit, as the app
+used to. The edits fill a puzzle in with its solution, with a wrong number placed and
+corrected every --wrong-every edits.
+Run from the project directory with: python -m benchmarks.session
+"""
+import argparse
+from timeit import default_timer as timer
+
+import numpy as np
+
+from benchmarks.corpora import corpora
+from session import SolverSession
+from sudoku import solve_sudoku
+
+
+def edits(sudoku, solution, n_edits, wrong_every, seed=0):
+    """
+    :return: up to n_edits (row, col, n) edits filling the empty cells of the sudoku
+    in a random order
+    """
+    rng = np.random.default_rng(seed)
+    grid_width = sudoku.shape[0]
+    rows, cols = (sudoku == 0).nonzero()
+    result = []
+    for i in rng.permutation(rows.shape[0])[:n_edits].tolist():
+        row, col = int(rows[i]), int(cols[i])
+        n = int(solution[row, col])
+        if len(result) % wrong_every == wrong_every - 1:
+            result.append((row, col, n % grid_width + 1))
+        result.append((row, col, n))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edits", type=int, default=40)
+    parser.add_argument("--wrong-every", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'corpus':<12}{'from scratch':>14}{'session':>10}{'speedup':>9}")
+    for name in ("easy-9", "17-clue-9", "16", "25"):
+        grid_width, block_width, sudokus = corpora()[name]
+        scratch_time = session_time = 0.0
+        n_edits = 0
+        for sudoku in sudokus:
+            solution, _, _ = solve_sudoku(sudoku, grid_width, block_width)
+            steps = edits(sudoku, solution, args.edits, args.wrong_every)
+            n_edits += len(steps)
+            grid = sudoku.copy()
+            start = timer()
+            for row, col, n in steps:
+                grid[row, col] = n
+                # the completed sudoku is the consistency check and holds the hint
+                solve_sudoku(grid, grid_width, block_width)
+            scratch_time += timer() - start
+            session = SolverSession(sudoku, grid_width, block_width)
+            start = timer()
+            for row, col, n in steps:
+                session.place(row, col, n)
+                session.is_consistent()
+                session.hint()
+            session_time += timer() - start
+        print(
+            f"{name:<12}{scratch_time / n_edits * 1e3:>12.2f}ms"
+            f"{session_time / n_edits * 1e3:>8.2f}ms"
+            f"{scratch_time / session_time:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
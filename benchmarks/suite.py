@@ -0,0 +1,426 @@
+"""
+Runs every engine over the fixed corpora of benchmarks/corpora.py and reports, for
+each (corpus, engine) pair, the time spent building the cover, searching and
+reconstructing the grid, the search nodes and backtracks, the peak RSS and the
+solves per second, as JSON. It also times the cold start of solving one puzzle with
+cli.py in a new Python process, which must stay under COLD_START_BUDGET and must not
+import pygame or CuPy.
+Run from the project directory with:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare baseline.json
+The compare mode exits with status 1 if a result regressed against the baseline, so
+it can gate a release. Each case runs in a fresh process so its peak RSS is its own.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import bitboard
+import dlx
+import parallel
+import sudoku
+import sudoku_para
+import vectorized
+from benchmarks.corpora import EASY_9, corpora
+from cover import column_rows, create_cover
+from stats import SolveStats
+
+# the metrics where a larger value is a regression, and the one where a smaller is
+TIME_METRICS = ("build_s", "search_s", "reconstruct_s", "cold_start_s")
+LOWER_IS_BETTER = TIME_METRICS + ("peak_rss_mb",)
+HIGHER_IS_BETTER = ("solves_per_s",)
+# search effort doesn't depend on the machine, so any increase is a regression
+EXACT_METRICS = ("nodes", "backtracks")
+# phases faster than this (in seconds) in the baseline are too noisy to compare
+MIN_TIME = 1e-3
+# the most seconds `python cli.py PUZZLE` may take to solve an easy puzzle in a new
+# process, whatever the baseline. Most of it is importing NumPy and the solvers.
+COLD_START_BUDGET = 0.5
+COLD_START_RUNS = 5
+# modules the command line tool must not import unless asked to
+HEAVY_MODULES = ("pygame", "cupy")
+
+
+def run_algx(grid, grid_width, block_width):
+    start = timer()
+    cover, possibilities = create_cover(grid, grid_width, block_width)
+    n_cols = 4 * grid_width * grid_width
+    col_rows = column_rows(cover, n_cols)
+    active_rows = np.ones(cover.shape[0], dtype=bool)
+    active_cols = np.ones(n_cols, dtype=bool)
+    built = timer()
+    solution = []
+    sudoku.solve(cover, col_rows, active_rows, active_cols, solution, None)
+    searched = timer()
+    completed = sudoku.build_final_sudoku(possibilities, solution, grid)
+    return completed, (built - start, searched - built, timer() - searched)
+
+
+def run_dlx(grid, grid_width, block_width):
+    start = timer()
+    cover, possibilities = create_cover(grid, grid_width, block_width)
+    links = dlx.build_links(cover, 4 * grid_width * grid_width)
+    built = timer()
+    solution = []
+    dlx.solve(links, solution, None)
+    searched = timer()
+    completed = sudoku.build_final_sudoku(possibilities, solution, grid)
+    return completed, (built - start, searched - built, timer() - searched)
+
+
+def run_bitboard(grid, grid_width, block_width):
+    start = timer()
+    bitboard.geometry(grid_width, block_width)
+    cells = [int(n) for n in grid.ravel()]
+    built = timer()
+    bitboard.solve(cells, None, grid_width=grid_width, block_width=block_width)
+    searched = timer()
+    completed = np.array(cells, dtype=grid.dtype).reshape(grid.shape)
+    return completed, (built - start, searched - built, timer() - searched)
+
+
+def run_parallel(grid, grid_width, block_width):
+    # the split, the worker pool and the reconstruction all happen inside
+    # solve_parallel(), so it is timed as search
+    start = timer()
+    completed, _, _ = parallel.solve_parallel(grid, grid_width, block_width)
+    return completed, (0.0, timer() - start, 0.0)
+
+
+def run_vectorized(grids, grid_width, block_width):
+    """
+    solves the whole corpus in one batch, timed as search
+    :return: a (completed_sudokus, phases) tuple, with None for the unsolved sudokus
+    """
+    start = timer()
+    completed, solved, _ = vectorized.solve_batch(
+        np.stack(grids), grid_width, block_width
+    )
+    searched = timer()
+    completed = [
+        completed_sudoku if ok else None
+        for completed_sudoku, ok in zip(completed, solved.tolist())
+    ]
+    return completed, (0.0, searched - start, 0.0)
+
+
+def para_runner(backend):
+    def run_para(grid, grid_width, block_width):
+        xp = sudoku_para.array_module(backend)
+        start = timer()
+        cover, possibilities = create_cover(grid, grid_width, block_width)
+        n_cols = 4 * grid_width * grid_width
+        indptr, indices = column_rows(cover, n_cols)
+        cover_backend = xp.asarray(cover)
+        active_rows = xp.ones(cover.shape[0], dtype=bool)
+        active_cols = xp.ones(n_cols, dtype=bool)
+        counts = sudoku_para.col_counts(xp, cover_backend, active_rows, n_cols)
+        built = timer()
+        solution = []
+        sudoku_para.solve(
+            xp,
+            cover_backend,
+            (indptr, xp.asarray(indices)),
+            active_rows,
+            active_cols,
+            counts,
+            solution,
+            None,
+        )
+        searched = timer()
+        completed = sudoku.build_final_sudoku(possibilities, solution, grid)
+        return completed, (built - start, searched - built, timer() - searched)
+
+    return run_para
+
+
+# engine name -> (phase timing runner, solve_sudoku function and its extra arguments).
+# The engines without a SolveStats have None in place of their solve_sudoku and no
+# node or backtrack counts.
+ENGINES = {
+    "algx": (run_algx, sudoku.solve_sudoku, {"engine": "algx"}),
+    "dlx": (run_dlx, sudoku.solve_sudoku, {"engine": "dlx"}),
+    "bitboard": (run_bitboard, bitboard.solve_sudoku, {}),
+    "para": (para_runner("numpy"), sudoku_para.solve_sudoku, {}),
+    "para-cupy": (para_runner("cupy"), sudoku_para.solve_sudoku, {"backend": "cupy"}),
+    "parallel": (run_parallel, None, {}),
+    "vectorized": (run_vectorized, None, {}),
+}
+# the engines whose runner takes the whole corpus at once
+BATCH_ENGINES = ("vectorized",)
+
+
+def available_engines():
+    """
+    :return: the names of the engines that can run here
+    """
+    engines = [engine for engine in ENGINES if engine != "para-cupy"]
+    try:
+        sudoku_para.array_module("cupy")
+    except ImportError:
+        return engines
+    return engines + ["para-cupy"]
+
+
+def peak_rss_mb():
+    """
+    :return: the peak resident set size of this process in MB, or None if it can't be
+    measured on this platform
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run_case(corpus, engine, repeat):
+    """
+    Runs in a fresh process. The first pass counts the nodes and backtracks with a
+    SolveStats, for the engines that take one, and warms up the cover template
+    caches. The phases are then timed over `repeat` passes without it, keeping the
+    fastest.
+    :return: the result of the (corpus, engine) pair as a dict
+    """
+    grid_width, block_width, grids = corpora()[corpus]
+    runner, solve_sudoku, kwargs = ENGINES[engine]
+
+    def run_corpus():
+        """
+        :return: the completed sudokus and the total time of each phase
+        """
+        if engine in BATCH_ENGINES:
+            completed, phases = runner(grids, grid_width, block_width)
+            return completed, np.array(phases)
+        completed, totals = [], np.zeros(3)
+        for grid in grids:
+            completed_sudoku, phases = runner(grid, grid_width, block_width)
+            completed.append(completed_sudoku)
+            totals += phases
+        return completed, totals
+
+    nodes = backtracks = None
+    if solve_sudoku is None:
+        completed, _ = run_corpus()
+    else:
+        nodes = backtracks = 0
+        completed = []
+        for grid in grids:
+            stats = SolveStats()
+            completed_sudoku, _, _ = solve_sudoku(
+                grid, grid_width, block_width, stats=stats, **kwargs
+            )
+            completed.append(completed_sudoku)
+            nodes += stats.nodes
+            backtracks += stats.backtracks
+    if any(completed_sudoku is None for completed_sudoku in completed):
+        raise RuntimeError(f"{engine} found no solution in corpus {corpus}")
+    best = None
+    for _ in range(repeat):
+        _, totals = run_corpus()
+        if best is None or totals.sum() < best.sum():
+            best = totals
+    build, search, reconstruct = best.tolist()
+    return {
+        "corpus": corpus,
+        "engine": engine,
+        "puzzles": len(grids),
+        "build_s": build,
+        "search_s": search,
+        "reconstruct_s": reconstruct,
+        "solves_per_s": len(grids) / (build + search + reconstruct),
+        "nodes": nodes,
+        "backtracks": backtracks,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def cold_start(runs=COLD_START_RUNS):
+    """
+    Times solving an easy puzzle with cli.py in a new process, keeping the fastest of
+    `runs` runs, and lists the HEAVY_MODULES importing cli.py pulls in.
+    :return: the result as a dict, with "cli" as its engine
+    """
+    project = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = None
+    for _ in range(runs):
+        start = timer()
+        subprocess.run(
+            [sys.executable, "cli.py", EASY_9[0]],
+            cwd=project,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        elapsed = timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    probe = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import cli, sys; print(*(m for m in {HEAVY_MODULES} if m in sys.modules))",
+        ],
+        cwd=project,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return {
+        "corpus": "cold-start",
+        "engine": "cli",
+        "puzzles": 1,
+        "cold_start_s": best,
+        "heavy_imports": probe.stdout.split(),
+    }
+
+
+def run_suite(corpus_names, engines, repeat, cold_start_runs=COLD_START_RUNS):
+    """
+    :param cold_start_runs: runs of cold_start(), 0 to skip it
+    :return: the results of every (corpus, engine) pair, with the environment they
+    were measured in
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for corpus in corpus_names:
+        for engine in engines:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(run_case, corpus, engine, repeat).result()
+            print(
+                f"{corpus:<11}{engine:<11}{result['solves_per_s']:>12.1f} solves/s",
+                file=sys.stderr,
+            )
+            results.append(result)
+    if cold_start_runs:
+        result = cold_start(cold_start_runs)
+        print(
+            f"{'cold-start':<11}{'cli':<11}{result['cold_start_s']:>12.3f} s "
+            f"(budget {COLD_START_BUDGET} s)",
+            file=sys.stderr,
+        )
+        results.append(result)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline, current, tolerance):
+    """
+    :param baseline: the suite results to compare against, as returned by run_suite()
+    :param current: the new suite results
+    :param tolerance: the relative slowdown (0.1 for 10%) allowed before a time, RSS
+    or throughput difference counts as a regression
+    :return: a list of messages, one for each regression. A cold start over
+    COLD_START_BUDGET or importing HEAVY_MODULES is one whatever the baseline.
+    """
+    baseline_results = {
+        (result["corpus"], result["engine"]): result for result in baseline["results"]
+    }
+    regressions = []
+    for result in current["results"]:
+        if result.get("cold_start_s", 0) > COLD_START_BUDGET:
+            regressions.append(
+                f"cold start {result['cold_start_s']:.3f}s is over the budget of "
+                f"{COLD_START_BUDGET}s"
+            )
+        if result.get("heavy_imports"):
+            regressions.append(
+                f"cli.py imports {', '.join(result['heavy_imports'])} at start up"
+            )
+    for result in current["results"]:
+        case = (result["corpus"], result["engine"])
+        if case not in baseline_results:
+            continue
+        old = baseline_results[case]
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER + EXACT_METRICS:
+            before, after = old.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            if metric in EXACT_METRICS:
+                regressed = after > before
+            elif metric in HIGHER_IS_BETTER:
+                regressed = after * (1 + tolerance) < before
+            elif metric in TIME_METRICS and before < MIN_TIME:
+                regressed = False
+            else:
+                regressed = after > before * (1 + tolerance)
+            if regressed:
+                change = (after - before) / before * 100 if before else float("inf")
+                regressions.append(
+                    f"{case[0]}/{case[1]} {metric}: {before:.6g} -> {after:.6g} "
+                    f"({change:+.1f}%)"
+                )
+    return regressions
+
+
+def main():
+    all_corpora = list(corpora())
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument(
+        "--compare", metavar="BASELINE", help="JSON results to check for regressions"
+    )
+    parser.add_argument(
+        "--current",
+        metavar="RESULTS",
+        help="with --compare, compare these JSON results instead of running the suite",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpora", nargs="+", choices=all_corpora, default=all_corpora)
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES))
+    parser.add_argument(
+        "--cold-start-runs",
+        type=int,
+        default=COLD_START_RUNS,
+        help="runs of the cold start timing, 0 to skip it",
+    )
+    args = parser.parse_args()
+    if args.current is not None:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        engines = args.engines or available_engines()
+        current = run_suite(
+            args.corpora, engines, args.repeat, args.cold_start_runs
+        )
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+        elif args.compare is None:
+            json.dump(current, sys.stdout, indent=2)
+            print()
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Per-puzzle cover setup time with and without the cached cover templates.
+Run from the project directory with: python -m benchmarks.template
+"""
+import argparse
+from itertools import cycle, islice
+from timeit import default_timer as timer
+
+from benchmarks.bitboard import HARD_17
+from cover import cover_template, create_cover
+from puzzle_io import read_puzzles
+
+
+def setup_time(sudokus, cached):
+    """
+    :return: the mean time create_cover() takes per sudoku. If `cached` is False the
+    template cache is cleared before every sudoku, as if each one rebuilt its cover
+    from scratch.
+    """
+    cover_template.cache_clear()
+    start = timer()
+    for sudoku in sudokus:
+        if not cached:
+            cover_template.cache_clear()
+        create_cover(sudoku, grid_width=9, block_width=3)
+    return (timer() - start) / len(sudokus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--puzzles", type=int, default=10000)
+    args = parser.parse_args()
+    sudokus = list(read_puzzles(islice(cycle(HARD_17), args.puzzles)))
+    uncached = setup_time(sudokus, cached=False)
+    cached = setup_time(sudokus, cached=True)
+    print(f"{len(sudokus)} 9x9 sudokus")
+    print(f"{'rebuilt template':<18}{uncached * 1e6:>10.1f} us/puzzle")
+    print(f"{'cached template':<18}{cached * 1e6:>10.1f} us/puzzle")
+    print(f"{'speedup':<18}{uncached / cached:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Throughput of the uniqueness check, count_solutions(sudoku, limit=2), per engine.
+The corpus is the 17-clue sudokus, which have a unique solution, and the same
+sudokus with one clue removed, which have several.
+Run from the project directory with: python -m benchmarks.uniqueness
+"""
+import argparse
+from timeit import default_timer as timer
+
+from benchmarks.bitboard import HARD_17, parse
+from sudoku import count_solutions
+
+
+def corpus():
+    sudokus = []
+    for line in HARD_17:
+        sudoku = parse(line)
+        sudokus.append(sudoku)
+        row, col = (sudoku != 0).nonzero()
+        ambiguous = sudoku.copy()
+        ambiguous[row[0], col[0]] = 0
+        sudokus.append(ambiguous)
+    return sudokus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sudokus = corpus()
+    print(f"{'engine':<10}{'checks/s':>10}")
+    for engine in ("bitboard", "dlx", "algx"):
+        start = timer()
+        for _ in range(args.repeat):
+            counts = [count_solutions(s, limit=2, engine=engine) for s in sudokus]
+        rate = args.repeat * len(sudokus) / (timer() - start)
+        assert counts == [1, 2] * len(HARD_17)
+        print(f"{engine:<10}{rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Grids per second of validate.validate() on 9x9 solutions, 1% of them with a
+swapped pair of cells, both from an array in memory and read a chunk at a time from
+a memory-mapped binary file. The first violations are checked against a
+straightforward validator on a sample.
+Run from the project directory with: python -m benchmarks.validate
+"""
+import argparse
+import os
+import tempfile
+from timeit import default_timer as timer
+
+import numpy as np
+
+from benchmarks.corpora import generated
+from puzzle_io import write_binary
+from validate import VALID, read_chunks, validate
+
+
+def corpus(n, seed=0):
+    """
+    :return: n (9, 9) uint8 solutions, as an (n, 9, 9) array, and the (n,) mask of
+    the ones that were made invalid
+    """
+    rng = np.random.default_rng(seed)
+    solutions = np.stack([generated(9, 3, 1.0, s) for s in range(64)]).astype(np.uint8)
+    solutions = solutions[rng.integers(0, 64, n)]
+    broken = rng.random(n) < 0.01
+    rows = rng.integers(0, 9, (np.count_nonzero(broken), 2))
+    for b, (row, col) in zip(np.flatnonzero(broken).tolist(), rows.tolist()):
+        # swapping two cells of a row breaks its columns, unless they hold the same
+        # number, which they don't in a solution
+        solutions[b, row, [col, (col + 1) % 9]] = solutions[b, row, [(col + 1) % 9, col]]
+    return solutions, broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grids", type=int, default=1_000_000)
+    args = parser.parse_args()
+    solutions, broken = corpus(args.grids)
+    start = timer()
+    valid, kinds, _ = validate(solutions)
+    elapsed = timer() - start
+    assert (valid == ~broken).all() and (kinds[broken] != VALID).all()
+    print(f"in memory: {args.grids / elapsed:,.0f} grids/s")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "solutions.bin")
+        with open(path, "wb") as file:
+            write_binary(solutions, file)
+        start = timer()
+        n_valid = sum(
+            np.count_nonzero(validate(chunk)[0]) for chunk in read_chunks(path)
+        )
+        elapsed = timer() - start
+    assert n_valid == np.count_nonzero(~broken)
+    print(f"memory-mapped file: {args.grids / elapsed:,.0f} grids/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+from functools import lru_cache
+from timeit import default_timer as timer
+
+import numpy as np
+
+from cover import cover_template
+from recording import path_recorder
+
+# how many branches solve() tries between calls to its stop callback
+STOP_CHECK_INTERVAL = 16
+
+
+def solve_sudoku(
+    sudoku: np.array, grid_width=9, block_width=3, path=None, stats=None
+):
+    """
+    Solves the sudoku with constraint propagation over bitsets instead of exact cover.
+    :param sudoku: the sudoku matrix (2-d numpy array)
+    :param grid_width: number of elements in a row
+    :param block_width: number of blocks in a row
+    :param path: how to record the solving path, as for sudoku.solve_sudoku()
+    :param stats: a stats.SolveStats to collect what the search does, or None. See
+    solve() for what it counts.
+    :return: a (completed_sudoku, solving_time, solution_path) tuple, the same as
+    sudoku.solve_sudoku().
+    """
+    grid = [int(n) for n in sudoku.ravel()]
+    solution_path = None
+    if path is not None:
+        # steps refer to the rows of the full cover, whose row cell * N + n - 1 is
+        # number n in that cell
+        solution_path = path_recorder(path, cover_template(grid_width, block_width)[1])
+    start = timer()
+    solved = solve(
+        grid,
+        solution_path,
+        grid_width=grid_width,
+        block_width=block_width,
+        stats=stats,
+    )
+    solving_time = timer() - start
+    if solved:
+        completed_sudoku = np.array(grid, dtype=sudoku.dtype).reshape(sudoku.shape)
+        if path != "compact":
+            solution_path = None
+        return completed_sudoku, solving_time, solution_path
+    return None, solving_time, None
+
+
+@lru_cache(maxsize=None)
+def geometry(grid_width=9, block_width=3):
+    """
+    :return: a (cell_units, units) tuple. cell_units[i] is the (row, col, block) cell i
+    belongs to and units lists every row, column and block as (kind, index, cells),
+    where kind is 0, 1 or 2 respectively.
+    """
+    n_cells = grid_width * grid_width
+    blocks_per_row = grid_width // block_width
+    cell_units = tuple(
+        (
+            i // grid_width,
+            i % grid_width,
+            (i // grid_width // block_width) * blocks_per_row
+            + i % grid_width // block_width,
+        )
+        for i in range(n_cells)
+    )
+    units = tuple(
+        (kind, index, tuple(i for i in range(n_cells) if cell_units[i][kind] == index))
+        for kind in range(3)
+        for index in range(grid_width)
+    )
+    return cell_units, units
+
+
+def solve(
+    grid: list,
+    solution_path,
+    grid_width=9,
+    block_width=3,
+    limit=1,
+    stop=None,
+    stats=None,
+):
+    """
+    Fills in the sudoku by propagating naked and hidden singles to a fixpoint and,
+    when that stalls, branching on the empty cell with the fewest candidates.
+    The digits already used by each row, column and block are kept as bitsets (bit
+    n - 1 is set if number n is used) and every placement is recorded on a trail, so
+    backtracking only undoes the placements made since the branch.
+    :param grid: the sudoku as a flat row-major list, 0 for empty cells. It is filled
+    in place.
+    :param solution_path: a list provided which will hold the execution path of the
+    algorithm as (action, cover_row) steps, where cover_row is cell * N + n - 1 and
+    action is 1 for placing n and 0 for removing it. None to not record it.
+    :param grid_width: number of elements in a row
+    :param block_width: number of blocks in a row
+    :param limit: the search stops once this many solutions are found. None searches
+    the whole tree.
+    :param stop: a callable checked every STOP_CHECK_INTERVAL branches. The search
+    gives up as soon as it returns True.
+    :param stats: a stats.SolveStats to collect what the search does, or None. Only
+    branching counts: a node is a candidate tried in a branch, not a number placed by
+    propagation, a branch is on a cell (passed as the col of on_branch()) and a dead
+    end is a contradiction found by propagation.
+    :return: the number of solutions found, so with the default limit it is truthy if
+    the algorithm successfully found a solution. grid holds the last solution found if
+    the limit was reached.
+    """
+    g_len = grid_width
+    n_cells = g_len * g_len
+    all_numbers = (1 << g_len) - 1
+    cell_units, units = geometry(grid_width, block_width)
+    used = ([0] * g_len, [0] * g_len, [0] * g_len)  # rows, cols, blocks
+    rows, cols, blocks = used
+    for i, n in enumerate(grid):
+        if n == 0:
+            continue
+        bit = 1 << (n - 1)
+        r, c, b = cell_units[i]
+        # a starting number that repeats in a unit can never be completed
+        if (rows[r] | cols[c] | blocks[b]) & bit:
+            return 0
+        rows[r] |= bit
+        cols[c] |= bit
+        blocks[b] |= bit
+    trail = []  # the cells filled in since the start, in order
+
+    def place(i, bit):
+        r, c, b = cell_units[i]
+        rows[r] |= bit
+        cols[c] |= bit
+        blocks[b] |= bit
+        grid[i] = bit.bit_length()
+        trail.append(i)
+        if solution_path is not None:
+            solution_path.append((1, i * g_len + grid[i] - 1))
+
+    def undo(trail_length):
+        while len(trail) > trail_length:
+            i = trail.pop()
+            r, c, b = cell_units[i]
+            bit = 1 << (grid[i] - 1)
+            rows[r] ^= bit
+            cols[c] ^= bit
+            blocks[b] ^= bit
+            if solution_path is not None:
+                solution_path.append((0, i * g_len + grid[i] - 1))
+            grid[i] = 0
+
+    def propagate():
+        """
+        :return: the empty cell with the fewest candidates, -1 if the grid is full, or
+        None if a contradiction was found.
+        """
+        # the candidates of every cell as of the last naked singles pass, 0 if filled
+        candidates = [0] * n_cells
+        empty = [i for i in range(n_cells) if not grid[i]]
+        while True:
+            progress = False
+            best, best_count = -1, g_len + 1
+            # naked singles: cells with exactly one candidate
+            empty = [i for i in empty if not grid[i]]
+            for i in empty:
+                r, c, b = cell_units[i]
+                cell_candidates = all_numbers & ~(rows[r] | cols[c] | blocks[b])
+                if not cell_candidates:
+                    return None
+                if not cell_candidates & (cell_candidates - 1):
+                    place(i, cell_candidates)
+                    candidates[i] = 0
+                    progress = True
+                    continue
+                candidates[i] = cell_candidates
+                if not progress and best_count > 2:
+                    count = bin(cell_candidates).count("1")
+                    if count < best_count:
+                        best, best_count = i, count
+            if progress:
+                continue
+            # hidden singles: numbers that fit in exactly one cell of a unit. Placing
+            # one makes the candidates of the other cells stale, but only ever too
+            # large, so a number missing from them is still missing and a number with
+            # one home left in them has at most that home.
+            for kind, index, cells in units:
+                once = twice = 0
+                for i in cells:
+                    twice |= once & candidates[i]
+                    once |= candidates[i]
+                unit_used = used[kind][index]
+                # a missing number with nowhere to go
+                if once | unit_used != all_numbers:
+                    return None
+                once &= ~(twice | unit_used)
+                if not once:
+                    continue
+                for i in cells:
+                    bit = candidates[i] & once
+                    if not bit:
+                        continue
+                    # the cell is the only home of two different numbers
+                    if bit & (bit - 1):
+                        return None
+                    r, c, b = cell_units[i]
+                    # its only home was taken since the candidates were found
+                    if grid[i] or (rows[r] | cols[c] | blocks[b]) & bit:
+                        return None
+                    place(i, bit)
+                    candidates[i] = 0
+                    progress = True
+            if not progress:
+                return best
+
+    found = 0
+    branches = 0
+    # [trail length, cell, untried candidates, candidate being tried] for each branch
+    stack = []
+    cell = propagate()
+    while True:
+        if cell == -1:
+            found += 1
+            if stats is not None:
+                stats.on_solution(len(stack))
+            if found == limit:
+                return found
+            # otherwise keep looking for the next one by backtracking
+        elif cell is not None:
+            r, c, b = cell_units[cell]
+            candidates = all_numbers & ~(rows[r] | cols[c] | blocks[b])
+            stack.append([len(trail), cell, candidates, 0])
+            if stats is not None:
+                stats.on_branch(len(stack) - 1, cell, bin(candidates).count("1"))
+        elif stats is not None:
+            stats.on_dead_end(len(stack))
+        # try the next candidate of the deepest branch that has one left
+        cell = None
+        while cell is None:
+            if not stack:
+                return found
+            branch = stack[-1]
+            undo(branch[0])
+            if stats is not None and branch[3]:
+                tried = branch[1] * g_len + branch[3].bit_length() - 1
+                stats.on_deselect(len(stack) - 1, tried)
+            candidates = branch[2]
+            if not candidates:
+                stack.pop()
+                continue
+            branches += 1
+            if stop is not None and not branches % STOP_CHECK_INTERVAL and stop():
+                return found
+            bit = candidates & -candidates
+            branch[2] = candidates ^ bit
+            branch[3] = bit
+            if stats is not None:
+                stats.on_select(len(stack) - 1, branch[1] * g_len + bit.bit_length() - 1)
+            place(branch[1], bit)
+            cell = propagate()
@@ -0,0 +1,125 @@
+"""
+A solution cache keyed by the canonical form of the sudokus (see canonical.py), so a
+sudoku that was seen before, or any symmetric variant of it, isn't solved again.
+"""
+import sqlite3
+from collections import OrderedDict
+from timeit import default_timer as timer
+
+import numpy as np
+
+from canonical import canonical_form, from_canonical, to_canonical
+from stats import CacheStats
+from sudoku import solve_sudoku
+
+# the number of solutions kept in memory by default
+CACHE_SIZE = 4096
+# stored instead of a solution for sudokus that have none
+UNSOLVABLE = b""
+
+
+class SolutionCache:
+    """
+    Keeps the solutions of canonical sudokus in memory, evicting the least recently
+    used first. With a path it also stores them in an SQLite database, which is read
+    on a memory miss, so they survive restarts and can be shared between processes.
+    Lookups are counted in stats, a stats.CacheStats.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, path=None):
+        """
+        :param maxsize: the number of solutions kept in memory
+        :param path: the SQLite database file to persist the solutions to, or None to
+        only keep them in memory
+        """
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS solutions "
+                "(key BLOB PRIMARY KEY, solution BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def solve_sudoku(self, sudoku: np.array, grid_width=9, block_width=3,
+                     engine="bitboard"):
+        """
+        Returns the cached solution of the sudoku, mapped back from its canonical
+        form, and only solves it with sudoku.solve_sudoku() on a miss.
+        :param engine: the solve_sudoku() engine used on a miss
+        :return: a (completed_sudoku, solving_time, solution_path) tuple like
+        sudoku.solve_sudoku(). On a hit solving_time is the time the lookup took. The
+        path isn't recorded, so solution_path is None.
+        """
+        start = timer()
+        canonical, transform = canonical_form(sudoku, block_width)
+        key = canonical.tobytes()
+        solution = self._get(key)
+        self.stats.on_lookup(solution is not None, timer() - start)
+        if solution is None:
+            completed_sudoku, solving_time, _ = solve_sudoku(
+                sudoku, grid_width=grid_width, block_width=block_width, engine=engine
+            )
+            if completed_sudoku is None:
+                self._put(key, UNSOLVABLE)
+            else:
+                solution = to_canonical(completed_sudoku, transform)
+                self._put(key, solution.astype(canonical.dtype).tobytes())
+            return completed_sudoku, solving_time, None
+        if solution == UNSOLVABLE:
+            return None, timer() - start, None
+        solution = np.frombuffer(solution, dtype=canonical.dtype).reshape(
+            canonical.shape
+        )
+        completed_sudoku = from_canonical(solution, transform).astype(sudoku.dtype)
+        return completed_sudoku, timer() - start, None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get(self, key):
+        """
+        :return: the stored solution bytes of the canonical sudoku, or None on a miss
+        """
+        solution = self._entries.get(key)
+        if solution is not None:
+            self._entries.move_to_end(key)
+            return solution
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT solution FROM solutions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def _put(self, key, solution):
+        self._remember(key, solution)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?)", (key, solution)
+            )
+            self._db.commit()
+
+    def _remember(self, key, solution):
+        self._entries[key] = solution
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -0,0 +1,150 @@
+"""
+Canonical forms of sudokus under the symmetries that preserve solvability: relabeling
+the digits, permuting the rows within a band, the bands, the columns within a stack,
+the stacks, and transposing. Equivalent sudokus share a canonical form, so a solution
+found for one of them can be mapped back to any other.
+"""
+from collections import namedtuple
+from itertools import islice, permutations, product
+
+import numpy as np
+
+# the most orderings of the rows (and of the columns) tried per orientation. Beyond
+# it the form found is still a valid transform of the sudoku, but equivalent sudokus
+# may no longer map to the same one.
+MAX_ORDERINGS = 16
+
+# canonical = relabeled with digits, after taking rows then cols of the sudoku
+# (transposed first if transpose is set). digits[n] is the label of digit n.
+Transform = namedtuple("Transform", ["transpose", "rows", "cols", "digits"])
+
+
+def canonical_form(sudoku: np.array, block_width=3):
+    """
+    Finds the smallest grid, read row by row, among the transforms of the sudoku
+    whose rows and columns are ordered by invariants of the clue pattern, with the
+    digits labeled in order of first appearance. Orderings the invariants can't
+    separate are all tried, up to MAX_ORDERINGS of them.
+    :param sudoku: the sudoku matrix (2-d numpy array)
+    :param block_width: number of blocks in a row
+    :return: a (canonical, transform) tuple. canonical is the canonical sudoku, as a
+    uint8 array for grids up to 255x255, and transform the Transform that maps the
+    sudoku to it.
+    """
+    grid_width = sudoku.shape[0]
+    # checked before the cast below, which would wrap negative numbers around
+    if sudoku.size and (sudoku.min() < 0 or sudoku.max() > grid_width):
+        raise ValueError(
+            f"the numbers of a {grid_width}x{grid_width} sudoku must be between 0 and "
+            f"{grid_width}"
+        )
+    dtype = np.uint8 if grid_width <= np.iinfo(np.uint8).max else np.uint16
+    sudoku = sudoku.astype(dtype)
+    best = None
+    for transpose in (False, True):
+        oriented = sudoku.T if transpose else sudoku
+        mask = oriented != 0
+        row_orders = _orderings(mask, block_width)
+        col_orders = _orderings(mask.T, block_width)
+        for rows, cols in product(row_orders, col_orders):
+            candidate = oriented[np.ix_(rows, cols)]
+            digits = _labels(candidate, grid_width)
+            candidate = digits[candidate]
+            key = candidate.tobytes()
+            if best is None or key < best[0]:
+                best = (key, candidate, Transform(transpose, rows, cols, digits))
+    return best[1], best[2]
+
+
+def to_canonical(sudoku: np.array, transform: Transform):
+    """
+    :return: the sudoku (or a solution of it) mapped through the transform
+    """
+    oriented = sudoku.T if transform.transpose else sudoku
+    return transform.digits[oriented[np.ix_(transform.rows, transform.cols)]]
+
+
+def from_canonical(grid: np.array, transform: Transform):
+    """
+    :return: the grid mapped back through the inverse of the transform, so that
+    from_canonical(to_canonical(sudoku, transform), transform) is the sudoku
+    """
+    inverse_digits = np.empty_like(transform.digits)
+    inverse_digits[transform.digits] = np.arange(transform.digits.shape[0])
+    oriented = np.empty_like(grid)
+    oriented[np.ix_(transform.rows, transform.cols)] = inverse_digits[grid]
+    return oriented.T if transform.transpose else oriented
+
+
+def _orderings(mask, block_width):
+    """
+    Orders the bands by their sorted row invariants, and the rows within each band by
+    their invariant: the number of clues in the row, then the sorted clue counts of
+    the columns its clues are in. Neither changes under digit relabeling or any
+    permutation of the columns, so equivalent sudokus order their rows the same way
+    up to ties, and every ordering of the tied rows and bands is returned.
+    :param mask: the (N, N) boolean clue pattern
+    :return: a list of row orders, as index arrays
+    """
+    grid_width = mask.shape[0]
+    row_counts = mask.sum(axis=1)
+    col_counts = mask.sum(axis=0)
+    row_keys = [
+        (int(row_counts[r]), tuple(sorted(col_counts[mask[r]].tolist())))
+        for r in range(grid_width)
+    ]
+    bands = []
+    for band in range(grid_width // block_width):
+        rows = range(band * block_width, (band + 1) * block_width)
+        bands.append(_tie_groups(rows, row_keys.__getitem__))
+    band_keys = [
+        tuple(sorted(row_keys[r] for group in groups for r in group))
+        for groups in bands
+    ]
+    band_groups = _tie_groups(range(len(bands)), band_keys.__getitem__)
+    # each choice is the order of one group of tied bands, or of tied rows in a band
+    choices = [list(permutations(group)) for group in band_groups]
+    choices += [list(permutations(group)) for groups in bands for group in groups]
+    orders = []
+    for choice in islice(product(*choices), MAX_ORDERINGS):
+        band_order = [band for group in choice[:len(band_groups)] for band in group]
+        row_choices = iter(choice[len(band_groups):])
+        band_rows = [
+            [r for _ in groups for r in next(row_choices)] for groups in bands
+        ]
+        orders.append(
+            np.array([r for band in band_order for r in band_rows[band]], dtype=np.intp)
+        )
+    return orders
+
+
+def _tie_groups(items, key):
+    """
+    :return: the items sorted by key, as a list of groups of items with equal keys
+    """
+    groups = []
+    previous = None
+    for item in sorted(items, key=key):
+        if groups and key(item) == previous:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+        previous = key(item)
+    return groups
+
+
+def _labels(grid, grid_width):
+    """
+    :return: an array mapping each digit to its label, 0 to 0 and the digits that
+    appear in the grid to 1, 2, ... in order of first appearance (row by row). The
+    digits that don't appear get the remaining labels in increasing order, which is
+    fine since they are interchangeable in any solution.
+    """
+    flat = grid.ravel()
+    present = flat[flat != 0]
+    _, first = np.unique(present, return_index=True)
+    order = present[np.sort(first)]
+    absent = np.setdiff1d(np.arange(1, grid_width + 1), order)
+    digits = np.zeros(grid_width + 1, dtype=grid.dtype)
+    digits[np.concatenate([order, absent])] = np.arange(1, grid_width + 1)
+    return digits
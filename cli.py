@@ -0,0 +1,144 @@
+"""
+Solves sudokus from the command line, without prompting.
+Usage: python cli.py [PUZZLE ...] [-f FILE] [--engine ENGINE] [--backend BACKEND]
+       [--format FORMAT] [-o OUTPUT] [--gui]
+
+Puzzles are given as arguments, one per argument in the one-line format of
+puzzle_io.py, or read from text or binary files (-f, '-' for stdin). With neither,
+they are read from stdin. Solutions are written in input order, "unsolvable" for a
+puzzle with none, and the exit status is 1 if there is any.
+
+pygame is only imported for --gui and CuPy only for --backend cupy, so solving a
+puzzle only pays for importing NumPy and the solvers.
+"""
+import argparse
+import math
+import sys
+from itertools import chain
+
+import sudoku_para
+from batch import DEFAULT_ENGINE, OUTPUT_FORMATS, write_solutions
+from puzzle_io import LAYOUTS, close_stdout, read_file, read_puzzles
+from sudoku import ENGINES, solve_sudoku
+
+# seconds the window stays open after replaying a solution with --gui
+GUI_WAIT = 3
+
+
+def solve_puzzles(
+    puzzles, engine=DEFAULT_ENGINE, backend="numpy", gui=False, times=None
+):
+    """
+    Solves the puzzles one at a time in this process.
+    :param engine: one of sudoku.ENGINES
+    :param backend: the array backend of the para engine, see sudoku_para.BACKENDS
+    :param gui: replay each solving path in a pygame window
+    :param times: a file to write each solving time to, or None
+    :return: a generator of the completed sudokus, None for the unsolvable ones
+    """
+    path = "compact" if gui else None
+    for sudoku in puzzles:
+        grid_width = sudoku.shape[0]
+        block_width = math.isqrt(grid_width)
+        if engine == "para":
+            completed_sudoku, solving_time, solution_path = sudoku_para.solve_sudoku(
+                sudoku, grid_width, block_width, path=path, backend=backend
+            )
+        else:
+            completed_sudoku, solving_time, solution_path = solve_sudoku(
+                sudoku, grid_width, block_width, engine=engine, path=path
+            )
+        if times is not None:
+            print(f"{solving_time:.6f}", file=times)
+        if gui and completed_sudoku is not None:
+            replay(sudoku, block_width, solution_path, solving_time)
+        yield completed_sudoku
+
+
+def replay(sudoku, block_width, solution_path, solving_time):
+    """
+    shows the solving path in a window, then the solving time for GUI_WAIT seconds
+    """
+    from GUI import Renderer
+
+    renderer = Renderer(sudoku, block_width)
+    if renderer.replay(solution_path):
+        renderer.write_time(f"Solved in {solving_time:.5f} seconds")
+        renderer.wait(GUI_WAIT)
+    renderer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("puzzles", nargs="*", metavar="PUZZLE")
+    parser.add_argument(
+        "-f",
+        "--file",
+        action="append",
+        default=[],
+        help="text or binary puzzle file, '-' for text on stdin. Can be repeated.",
+    )
+    parser.add_argument(
+        "--layout", choices=LAYOUTS, default="auto", help="layout of text files"
+    )
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument(
+        "--backend",
+        choices=sudoku_para.BACKENDS,
+        default="numpy",
+        help="array backend of the para engine",
+    )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="line")
+    parser.add_argument("-o", "--output", default="-", help="'-' for stdout")
+    parser.add_argument(
+        "--gui", action="store_true", help="replay each solving path in a window"
+    )
+    parser.add_argument(
+        "--times", action="store_true", help="write each solving time to stderr"
+    )
+    args = parser.parse_args()
+    if args.backend != "numpy" and args.engine != "para":
+        parser.error("--backend is only used by --engine para")
+    if args.format == "binary" and args.output == "-":
+        parser.error("binary solutions need an --output file")
+    files = args.file or ([] if args.puzzles else ["-"])
+    puzzles = chain(
+        read_puzzles(args.puzzles, "line"),
+        *(read_file(file, args.layout) for file in files),
+    )
+    try:
+        first = next(puzzles, None)
+        if first is None:
+            return
+        solutions = solve_puzzles(
+            chain([first], puzzles),
+            engine=args.engine,
+            backend=args.backend,
+            gui=args.gui,
+            times=sys.stderr if args.times else None,
+        )
+        unsolvable = 0
+
+        def counted(solutions):
+            nonlocal unsolvable
+            for completed_sudoku in solutions:
+                unsolvable += completed_sudoku is None
+                yield completed_sudoku
+
+        write_solutions(counted(solutions), args.output, args.format, first.shape[0])
+    except (ValueError, ImportError) as error:
+        # bad puzzles, or a missing CuPy
+        sys.exit(f"error: {error}")
+    if unsolvable:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        # the reader of stdout has seen enough
+        close_stdout()
+        sys.exit(1)
@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+import numpy as np
+
+# possibilities[i] is the (row, col, number) 'name' of row i in the cover
+POSSIBILITY_DTYPE = np.dtype([("row", np.int32), ("col", np.int32), ("n", np.int32)])
+
+# number of geometries whose cover template is kept around
+TEMPLATE_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def cover_template(grid_width=9, block_width=3):
+    """
+    Builds the cover of the empty grid, which holds every (row, col, number) candidate
+    of the geometry. The cover of any sudoku with this geometry is a subset of its rows
+    (see create_cover()), so templates are cached per geometry and evicted least
+    recently used first. The returned arrays are read-only since they are shared.
+    :return: the (cover, possibilities) of the empty grid
+    """
+    # every (row, col, number) candidate, in row-major cell order then by number
+    rows, cols, ns = np.indices((grid_width,) * 3, dtype=np.int32)
+    possibilities = np.empty(grid_width ** 3, dtype=POSSIBILITY_DTYPE)
+    possibilities["row"] = rows.ravel()
+    possibilities["col"] = cols.ravel()
+    possibilities["n"] = ns.ravel() + 1
+    cover = constraint_columns(
+        possibilities["row"],
+        possibilities["col"],
+        possibilities["n"],
+        grid_width=grid_width,
+        block_width=block_width,
+    )
+    cover.setflags(write=False)
+    possibilities.setflags(write=False)
+    return cover, possibilities
+
+
+def create_cover(sudoku, grid_width=9, block_width=3):
+    """
+    Creates the relationship matrix used by algorithm-x.
+    Every possibility satisfies exactly 4 constraints, so rather than a dense 0-1 matrix
+    the cover is stored as an (n_possibilities, 4) array holding, for each row, the
+    indices of the columns that contain a 1, in the narrowest dtype that fits them
+    (see column_dtype()).
+    :param sudoku: the sudoku matrix (2-d numpy array)
+    :param grid_width: number of elements in a row
+    :param block_width: number of blocks in a row
+    :return: a (cover, possibilities) tuple. cover is the (n_possibilities, 4) integer
+    column index array and possibilities is a structured array of POSSIBILITY_DTYPE
+    such that possibilities[i] is the name for row i in cover.
+    """
+    cover, possibilities = cover_template(grid_width, block_width)
+    givens = np.repeat(sudoku.ravel(), grid_width)
+    # a starting number only keeps its own possibility, an empty slot keeps them all
+    keep = (givens == 0) | (givens == possibilities["n"])
+    return cover[keep], possibilities[keep]
+
+
+def constraint_columns(rows, cols, ns, grid_width=9, block_width=3):
+    """
+    :param rows: the rows of the possibilities (1-d numpy array)
+    :param cols: the columns of the possibilities
+    :param ns: the numbers of the possibilities
+    :return: an (n_possibilities, 4) array of column_dtype() with the indices of the 4
+    constraint columns each possibility satisfies.
+    """
+    area = grid_width * grid_width
+    columns = np.empty((rows.shape[0], 4), dtype=column_dtype(4 * area))
+    # Row-Column constraint
+    columns[:, 0] = rows * grid_width + cols
+    # Row-Number constraint
+    columns[:, 1] = area + rows * grid_width + ns - 1
+    # Col-Number constraint
+    columns[:, 2] = 2 * area + cols * grid_width + ns - 1
+    # Block-Number constraint
+    # block_idx is the nth block, counting from left to right, top-down
+    blocks_per_row = grid_width // block_width
+    block_idx = (rows // block_width) * blocks_per_row + cols // block_width
+    columns[:, 3] = 3 * area + block_idx * grid_width + ns - 1
+    return columns
+
+
+def column_dtype(n_cols):
+    """
+    :return: the narrowest signed integer dtype that holds the indices of n_cols
+    columns. Up to 90x90 grids their cover fits in int16, half the size of int32.
+    """
+    for dtype in (np.int16, np.int32):
+        if n_cols - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def column_rows(cover, n_cols):
+    """
+    Transposes the cover so the rows containing a 1 in a column can be looked up.
+    :param cover: the (n_possibilities, 4) column index array
+    :param n_cols: number of columns (constraints) in the cover
+    :return: an (indptr, indices) tuple such that indices[indptr[c]:indptr[c + 1]] are
+    the cover rows with a 1 in column c, in increasing order.
+    """
+    flat = cover.ravel()
+    indices = (np.argsort(flat, kind="stable") // cover.shape[1]).astype(np.int32)
+    indptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(flat, minlength=n_cols), out=indptr[1:])
+    return indptr, indices
@@ -0,0 +1,182 @@
+import numpy as np
+
+
+def build_links(cover, n_cols):
+    """
+    Builds the Dancing Links node pool for a cover.
+    Every 1 in the cover becomes a node that is linked to its neighbours in the same
+    row (left/right) and in the same column (up/down). Node 0 is the root, and nodes
+    1..n_cols are the column headers, so the header of cover column c is node c + 1.
+    :param cover: the cover, as an (n_rows, 4) array of column indices
+    :param n_cols: number of columns (constraints) in the cover
+    :return: a (left, right, up, down, column, row, size) tuple of flat integer lists.
+    column[i] is the header node of node i, row[i] is the cover row node i belongs to
+    and size[h] is the number of nodes currently in the column headed by h.
+    """
+    n_headers = n_cols + 1
+    # nodes of the same row are contiguous
+    node_rows = np.repeat(np.arange(cover.shape[0]), cover.shape[1])
+    node_cols = cover.ravel().astype(np.int64)
+    n_nodes = n_headers + node_rows.shape[0]
+    nodes = np.arange(n_headers, n_nodes)
+
+    left = np.empty(n_nodes, dtype=np.int64)
+    right = np.empty(n_nodes, dtype=np.int64)
+    up = np.empty(n_nodes, dtype=np.int64)
+    down = np.empty(n_nodes, dtype=np.int64)
+    column = np.empty(n_nodes, dtype=np.int64)
+    row = np.full(n_nodes, -1, dtype=np.int64)
+    size = np.zeros(n_headers, dtype=np.int64)
+
+    # the root and the headers form one circular list
+    headers = np.arange(n_headers)
+    left[headers] = np.roll(headers, 1)
+    right[headers] = np.roll(headers, -1)
+    column[headers] = headers
+    column[nodes] = node_cols + 1
+    row[nodes] = node_rows
+    size[1:] = np.bincount(node_cols, minlength=n_cols)
+
+    # horizontal links: each row is a circular list of its own nodes
+    row_starts = np.flatnonzero(np.diff(node_rows, prepend=-1)) + n_headers
+    row_ends = np.append(row_starts[1:], n_nodes) - 1
+    right[nodes] = nodes + 1
+    left[nodes] = nodes - 1
+    right[row_ends] = row_starts
+    left[row_starts] = row_ends
+
+    # vertical links: each column is a circular list running header -> nodes top-down
+    by_col = nodes[np.argsort(node_cols, kind="stable")]
+    col_starts = np.flatnonzero(np.diff(column[by_col], prepend=-1))
+    col_ends = np.append(col_starts[1:], by_col.shape[0]) - 1
+    down[headers] = headers
+    up[headers] = headers
+    down[by_col[:-1]] = by_col[1:]
+    up[by_col[1:]] = by_col[:-1]
+    col_headers = column[by_col[col_starts]]
+    down[col_headers] = by_col[col_starts]
+    up[by_col[col_starts]] = col_headers
+    up[col_headers] = by_col[col_ends]
+    down[by_col[col_ends]] = col_headers
+
+    # plain lists are much faster than numpy arrays for scalar indexing in the search
+    return (
+        left.tolist(),
+        right.tolist(),
+        up.tolist(),
+        down.tolist(),
+        column.tolist(),
+        row.tolist(),
+        size.tolist(),
+    )
+
+
+def solve(links, solution: list, solution_path, limit=1, stats=None):
+    """
+    solves the exact cover problem with Knuth's Dancing Links implementation of
+    algorithm-x. See https://arxiv.org/abs/cs/0011047 for the high level algorithm.
+    The search is iterative: the stack holds the node chosen at each level, so the
+    depth is not bounded by Python's recursion limit, and covering/uncovering a column
+    only touches the nodes that are actually unlinked.
+    :param links: the node pool built by build_links(). It is modified during the
+    search and restored on backtracking.
+    :param solution: a list provided which will hold the final solution.
+    :param solution_path: a list provided which will hold the execution path of the
+    algorithm, or None to not record it.
+    :param limit: the search stops once this many solutions are found. None searches
+    the whole tree.
+    :param stats: a stats.SolveStats to collect what the search does, or None. It
+    counts, but doesn't profile.
+    :return: the number of solutions found, so with the default limit it is truthy if
+    the algorithm successfully found a solution. solution holds the last solution
+    found if the limit was reached.
+    """
+    left, right, up, down, column, row, size = links
+    root = 0
+
+    def cover(c):
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(c):
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def deselect(x):
+        """
+        restores the columns the row of node x covered
+        :return: the next node of x's column
+        """
+        if solution_path is not None:
+            solution_path.append((0, row[x]))  # 0 denotes deselecting this row
+        if stats is not None:
+            stats.on_deselect(len(stack), row[x])
+        j = left[x]
+        while j != x:
+            uncover(column[j])
+            j = left[j]
+        return down[x]
+
+    stack = []  # the node selected at each level of the search
+    found = 0
+    while True:
+        # no active columns means the solution is found.
+        if right[root] == root:
+            found += 1
+            if stats is not None:
+                stats.on_solution(len(stack))
+            if found == limit:
+                solution.extend(row[x] for x in stack)
+                return found
+            # otherwise keep looking for the next one by backtracking
+            if not stack:
+                return found
+            x = deselect(stack.pop())
+        else:
+            # pick the column with the least number of 1s.
+            c = right[root]
+            col, count = c, size[c]
+            while c != root:
+                if size[c] < count:
+                    col, count = c, size[c]
+                c = right[c]
+            if stats is not None:
+                if count:
+                    stats.on_branch(len(stack), col, count)
+                else:
+                    stats.on_dead_end(len(stack))
+            cover(col)
+            x = down[col]
+        while x == column[x]:
+            # every row of this column has been tried: backtrack to the previous level
+            uncover(column[x])
+            if not stack:
+                return found
+            x = deselect(stack.pop())
+        stack.append(x)
+        if stats is not None:
+            stats.on_select(len(stack) - 1, row[x])
+        if solution_path is not None:
+            solution_path.append((1, row[x]))  # 1 denotes selecting this row
+        j = right[x]
+        while j != x:
+            cover(column[j])
+            j = right[j]
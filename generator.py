@@ -0,0 +1,311 @@
+"""
+Generates sudokus with a unique solution and rates how hard they are.
+Usage: python generator.py [-n COUNT] [--size N] [--seed SEED] [-w WORKERS]
+       [--min-clues CLUES] [-o OUTPUT]
+
+Each puzzle is written on a line of its own, after a comment line with its rating, so
+the output can be read back with puzzle_io.read_puzzles(). Puzzles smaller than 9x9
+are written as grids instead, since a line of fewer than 81 cells is read as a row.
+"""
+import argparse
+import math
+import os
+import sys
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+import bitboard
+import sudoku
+from cover import column_rows, cover_template, create_cover
+from puzzle_io import close_stdout, format_grid, format_puzzle
+from stats import SolveStats
+
+# the difficulty levels, from the techniques a puzzle needs: naked singles only,
+# hidden singles too, guessing with at most EXPERT_BACKTRACKS wrong guesses undone,
+# and guessing with more
+LEVELS = ("easy", "medium", "hard", "expert")
+EXPERT_BACKTRACKS = 10
+TECHNIQUES = ("naked single", "hidden single", "guess")
+# nodes of the search for a full grid after which it restarts with another random
+# order, per cell, since an unlucky order can take orders of magnitude longer
+RESTART_NODES_PER_CELL = 20
+# the most branches a uniqueness check of a grid larger than 9x9 may take, and the
+# most nodes the search that rates a puzzle may take. A check that runs out keeps the
+# clue, so large grids stay provably unique, and a rating that runs out is expert.
+# 9x9 checks are cheap enough to always run to the end.
+CHECK_BRANCHES = 256
+RATING_NODES = 50_000
+# the most clues removed at once, per cell. Nearly full grids stay unique, so
+# removing many clues at once saves uniqueness checks; the batch halves after each
+# failure, down to one clue at a time, and doubles again after each success.
+MAX_REMOVAL_FRACTION = 1 / 8
+
+Rating = namedtuple("Rating", ["level", "nodes", "backtracks", "techniques"])
+
+
+class RatingStats(SolveStats):
+    """
+    Also records the techniques the algorithm-x search used: branching on a cell
+    column with one row left is a naked single, on any other column with one row left
+    a hidden single, and on a column with more rows a guess.
+    """
+
+    def __init__(self, grid_width=9):
+        super().__init__()
+        # the cell columns come first in the cover, see cover.constraint_columns()
+        self.n_cell_columns = grid_width * grid_width
+        self.techniques = Counter()
+
+    def on_branch(self, depth, col, n_candidates):
+        super().on_branch(depth, col, n_candidates)
+        if n_candidates > 1:
+            self.techniques["guess"] += 1
+        elif col < self.n_cell_columns:
+            self.techniques["naked single"] += 1
+        else:
+            self.techniques["hidden single"] += 1
+
+
+def random_grid(rng, grid_width=9, block_width=3):
+    """
+    Fills the empty grid with algorithm-x, trying the rows of the cover in a random
+    order, and restarting with a new order when a search takes too long.
+    :param rng: a numpy Generator
+    :return: the complete grid (2-d numpy array)
+    """
+    cover, possibilities = cover_template(grid_width, block_width)
+    n_cols = 4 * grid_width * grid_width
+    budget = RESTART_NODES_PER_CELL * grid_width * grid_width
+    while True:
+        order = rng.permutation(cover.shape[0])
+        shuffled = cover[order]
+        checks = 0
+
+        def stop():
+            nonlocal checks
+            checks += 1
+            return checks * sudoku.STOP_CHECK_INTERVAL >= budget
+
+        solution = []
+        found = sudoku.solve(
+            shuffled,
+            column_rows(shuffled, n_cols),
+            np.ones(shuffled.shape[0], dtype=bool),
+            np.ones(n_cols, dtype=bool),
+            solution,
+            None,
+            stop=stop,
+        )
+        if found:
+            grid = np.zeros((grid_width, grid_width), dtype=np.uint8)
+            return sudoku.build_final_sudoku(possibilities[order], solution, grid)
+
+
+def remove_clues(grid, rng, block_width=3, min_clues=0, check_branches=None):
+    """
+    Empties the cells of the grid in a random order, keeping each clue whose removal
+    would give the puzzle a second solution. The checks count solutions with
+    bitboard.solve() and stop at the second one.
+    :param grid: a sudoku with a unique solution, usually a complete grid
+    :param rng: a numpy Generator
+    :param min_clues: stop once only this many clues are left
+    :param check_branches: the most branches of a check, past which the clue is kept
+    as if removing it had given a second solution. None for CHECK_BRANCHES on grids
+    larger than 9x9 and no limit on the others.
+    :return: the puzzle. With min_clues=0 it is minimal unless a check ran out:
+    removing any clue left gives it several solutions. Without a limit on the checks
+    it is always minimal.
+    """
+    grid_width = grid.shape[0]
+    if check_branches is None and grid_width > 9:
+        check_branches = CHECK_BRANCHES
+    puzzle = grid.copy()
+    flat = puzzle.reshape(-1)
+    cells = rng.permutation(np.flatnonzero(flat))
+    clues = cells.shape[0]
+    max_batch = max(1, int(grid_width * grid_width * MAX_REMOVAL_FRACTION))
+    batch = max_batch
+    i = 0
+    while i < cells.shape[0] and clues > min_clues:
+        removed = cells[i:i + min(batch, clues - min_clues)]
+        values = flat[removed]
+        flat[removed] = 0
+        if is_unique(puzzle, block_width, check_branches):
+            i += removed.shape[0]
+            clues -= removed.shape[0]
+            batch = min(max_batch, 2 * batch)
+        else:
+            flat[removed] = values
+            if batch == 1:
+                # the clue stays
+                i += 1
+            batch = max(1, batch // 2)
+    return puzzle
+
+
+def is_unique(puzzle, block_width=3, max_branches=None):
+    """
+    :param max_branches: the most branches to search, None for no limit
+    :return: whether the puzzle has exactly one solution, False if the search ran
+    out of branches before it could tell
+    """
+    grid_width = puzzle.shape[0]
+    checks = 0
+    ran_out = False
+
+    def stop():
+        nonlocal checks, ran_out
+        checks += 1
+        ran_out = checks * bitboard.STOP_CHECK_INTERVAL >= max_branches
+        return ran_out
+
+    found = bitboard.solve(
+        [int(n) for n in puzzle.ravel()],
+        None,
+        grid_width,
+        block_width,
+        limit=2,
+        stop=None if max_branches is None else stop,
+    )
+    return found == 1 and not ran_out
+
+
+def rate(puzzle, grid_width=9, block_width=3, max_nodes=RATING_NODES):
+    """
+    Rates the puzzle from the algorithm-x search that solves it. With the minimum
+    remaining values heuristic the search only branches on a column with several rows
+    when no single is left, so the columns it branches on tell which techniques the
+    puzzle needs.
+    :param max_nodes: the most nodes of the search. A puzzle that needs more is
+    expert, with the counts of the search so far.
+    :return: a Rating of the puzzle's level (see LEVELS), the nodes and backtracks of
+    the search, and the techniques used (a dict of how often each of TECHNIQUES was)
+    """
+    stats = RatingStats(grid_width)
+    cover, _ = create_cover(puzzle, grid_width, block_width)
+    n_cols = 4 * grid_width * grid_width
+    sudoku.solve(
+        cover,
+        column_rows(cover, n_cols),
+        np.ones(cover.shape[0], dtype=bool),
+        np.ones(n_cols, dtype=bool),
+        [],
+        None,
+        stop=lambda: stats.nodes >= max_nodes,
+        stats=stats,
+    )
+    techniques = stats.techniques
+    if stats.nodes >= max_nodes:
+        level = "expert"
+    elif techniques["guess"]:
+        level = "expert" if stats.backtracks > EXPERT_BACKTRACKS else "hard"
+    elif techniques["hidden single"]:
+        level = "medium"
+    else:
+        level = "easy"
+    return Rating(level, stats.nodes, stats.backtracks, dict(techniques))
+
+
+def generate(seed=None, grid_width=9, block_width=3, min_clues=0):
+    """
+    :param seed: anything numpy.random.default_rng() accepts. The same seed always
+    gives the same puzzle.
+    :param min_clues: the fewest clues the puzzle keeps, see remove_clues()
+    :return: a (puzzle, solution, rating) tuple
+    """
+    rng = np.random.default_rng(seed)
+    solution = random_grid(rng, grid_width, block_width)
+    puzzle = remove_clues(solution, rng, block_width, min_clues)
+    return puzzle, solution, rate(puzzle, grid_width, block_width)
+
+
+def generate_many(
+    n,
+    grid_width=9,
+    block_width=3,
+    seed=None,
+    workers=None,
+    min_clues=0,
+    chunksize=16,
+):
+    """
+    Generates n puzzles across a pool of worker processes. Every puzzle has its own
+    seed spawned from `seed`, so the puzzles only depend on `seed` and not on the
+    number of workers.
+    :param workers: number of worker processes, defaults to the number of CPUs. 1
+    generates them in this process.
+    :param chunksize: number of puzzles generated by a worker at a time
+    :return: a generator of (puzzle, solution, rating) tuples, see generate()
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(n)
+    args = (
+        seeds,
+        repeat(grid_width),
+        repeat(block_width),
+        repeat(min_clues),
+    )
+    if workers == 1:
+        yield from map(generate, *args)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(generate, *args, chunksize=chunksize)
+
+
+def format_rated(puzzle, rating):
+    """
+    :return: the puzzle after a comment line with its rating, in the layout
+    puzzle_io.read_puzzles() reads back by default
+    """
+    grid_width = puzzle.shape[0]
+    text = format_puzzle(puzzle) if grid_width >= 9 else format_grid(puzzle)
+    return (
+        f"# {rating.level}, {np.count_nonzero(puzzle)} clues, "
+        f"{rating.nodes} nodes, {rating.backtracks} backtracks\n{text}\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-n", "--count", type=int, default=10)
+    parser.add_argument("--size", type=int, default=9, help="grid width, 4 to 25")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--min-clues", type=int, default=0)
+    parser.add_argument("-o", "--output", default="-", help="'-' for stdout")
+    args = parser.parse_args()
+    block_width = math.isqrt(args.size)
+    if block_width * block_width != args.size:
+        parser.error(f"a {args.size}x{args.size} grid has no square blocks")
+    puzzles = generate_many(
+        args.count,
+        args.size,
+        block_width,
+        seed=args.seed,
+        workers=args.workers,
+        min_clues=args.min_clues,
+    )
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    levels = Counter()
+    with output:
+        for puzzle, _, rating in puzzles:
+            levels[rating.level] += 1
+            output.write(format_rated(puzzle, rating))
+    print(
+        ", ".join(f"{levels[level]} {level}" for level in LEVELS), file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        # the reader of stdout has seen enough
+        close_stdout()
+        sys.exit(1)
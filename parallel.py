@@ -0,0 +1,170 @@
+"""
+Solves a single large sudoku on several cores by splitting the top of the search tree
+into independent sub-problems.
+"""
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from timeit import default_timer as timer
+
+import numpy as np
+
+from cover import column_rows, create_cover
+from sudoku import REMOVED_COUNT, build_final_sudoku, col_counts, min_col, solve
+
+# set in each worker by _init_worker(): the event the parent sets to cancel the
+# running searches, and the cover and column to rows lookup shared by all sub-problems
+_cancelled = None
+_cover = None
+_col_rows = None
+
+
+def split(cover, n_cols, n_subproblems):
+    """
+    Expands the search tree breadth first, branching on the same column algorithm-x
+    would choose, until there are at least `n_subproblems` open branches.
+    :param cover: the cover, as an (n_rows, 4) array of column indices
+    :param n_cols: number of columns in the cover
+    :param n_subproblems: the number of branches to aim for
+    :return: a (subproblems, solution) tuple. subproblems lists each open branch as
+    the tuple of rows selected to reach it. solution is the rows of a solution if one
+    was found while splitting, None otherwise.
+    """
+    frontier = [()]
+    while frontier and len(frontier) < n_subproblems:
+        expanded = []
+        for prefix in frontier:
+            active_rows, active_cols = apply_prefix(cover, n_cols, prefix)
+            if not active_cols.any():
+                return [], prefix
+            counts = col_counts(cover, active_rows, n_cols)
+            counts[~active_cols] += REMOVED_COUNT
+            col, count = min_col(counts)
+            candidate_rows = np.flatnonzero(active_rows & (cover == col).any(axis=1))
+            expanded += [prefix + (int(row),) for row in candidate_rows]
+        frontier = expanded
+    return frontier, None
+
+
+def apply_prefix(cover, n_cols, prefix):
+    """
+    :return: the (active_rows, active_cols) masks left after selecting the rows in
+    prefix.
+    """
+    active_rows = np.ones(cover.shape[0], dtype=bool)
+    active_cols = np.ones(n_cols, dtype=bool)
+    if prefix:
+        columns = cover[list(prefix)].ravel()
+        active_rows &= ~np.isin(cover, columns).any(axis=1)
+        active_cols[columns] = False
+    return active_rows, active_cols
+
+
+def solve_parallel(sudoku: np.array, grid_width=9, block_width=3, workers=None,
+                   split_factor=8):
+    """
+    Solves the sudoku with algorithm-x on `workers` processes. The first worker to
+    find a solution wins and the others are cancelled.
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :param split_factor: the search tree is split into at least this many
+    sub-problems per worker. Idle workers take the next sub-problem from the pool's
+    queue, so more sub-problems balance the load better at some cost in overhead.
+    :return: a (completed_sudoku, solving_time, solution_path) tuple like
+    sudoku.solve_sudoku(). The path isn't recorded, so solution_path is None.
+    """
+    start = timer()
+    count, solution = _search(
+        sudoku, grid_width, block_width, 1, workers, split_factor
+    )
+    solving_time = timer() - start
+    if not count:
+        return None, solving_time, None
+    _, possibilities = create_cover(sudoku, grid_width, block_width)
+    return build_final_sudoku(possibilities, solution, sudoku), solving_time, None
+
+
+def count_solutions_parallel(sudoku: np.array, grid_width=9, block_width=3,
+                             limit=None, workers=None, split_factor=8):
+    """
+    Counts the solutions of the sudoku, like sudoku.count_solutions(), on `workers`
+    processes. The workers are cancelled once `limit` solutions were found between
+    them.
+    :return: the number of solutions, at most `limit`
+    """
+    count, _ = _search(sudoku, grid_width, block_width, limit, workers, split_factor)
+    return count
+
+
+def _search(sudoku, grid_width, block_width, limit, workers, split_factor):
+    """
+    :return: a (count, solution) tuple, where solution is the cover rows of a solution
+    or None if none was found.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    cover, _ = create_cover(sudoku, grid_width, block_width)
+    subproblems, solution = split(
+        cover, 4 * grid_width * grid_width, workers * split_factor
+    )
+    if solution is not None:
+        if limit == 1:
+            return 1, list(solution)
+        # the tree is too small to be worth splitting
+        subproblems = [()]
+    count = 0
+    cancelled = multiprocessing.Event()
+    col_rows = column_rows(cover, 4 * grid_width * grid_width)
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(cancelled, cover, col_rows)
+    ) as executor:
+        pending = {
+            executor.submit(_solve_subproblem, prefix, limit) for prefix in subproblems
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, rows = future.result()
+                count += found
+                if rows is not None:
+                    solution = rows
+            if limit is not None and count >= limit:
+                count = limit
+                cancelled.set()
+                for future in pending:
+                    future.cancel()
+                break
+    return count, solution
+
+
+def _init_worker(cancelled, cover, col_rows):
+    global _cancelled, _cover, _col_rows
+    _cancelled = cancelled
+    _cover = cover
+    _col_rows = col_rows
+
+
+def _solve_subproblem(prefix, limit):
+    """
+    Runs in a worker process: searches the branch reached by selecting the rows of
+    prefix.
+    :return: a (count, solution) tuple, where solution is the cover rows of the last
+    solution found, prefix included, or None if none was found.
+    """
+    if _cancelled.is_set():
+        return 0, None
+    n_cols = _col_rows[0].shape[0] - 1
+    active_rows, active_cols = apply_prefix(_cover, n_cols, prefix)
+    solution = []
+    found = solve(
+        _cover,
+        _col_rows,
+        active_rows,
+        active_cols,
+        solution,
+        None,
+        limit=limit,
+        stop=_cancelled.is_set,
+    )
+    if not found or not solution:
+        return found, None
+    return found, list(prefix) + [int(row) for row in solution]
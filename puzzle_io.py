@@ -0,0 +1,353 @@
+"""
+Reads and writes sudokus in bulk, one at a time so a corpus is never held in memory.
+
+Text puzzles come either one per line (81 characters for a 9x9 sudoku, or the N*N
+numbers of an NxN grid separated by spaces or commas) or as grids of N rows, such as
+
+. . 3 | . 2 . | 6 . .
+9 . . | 3 . 5 | . . 1
+------+-------+------
+
+with 0 or . for empty cells. '|' and lines of only '-', '+' and '=' are ignored, and
+blank lines and lines starting with '#' are skipped.
+
+The binary format is a HEADER_SIZE byte header followed by fixed size records, one
+per sudoku, each cell packed in a nibble for 9x9 sudokus and in a byte for grids up
+to 255x255. It can be memory-mapped, so reading it is a matter of viewing the file
+as a NumPy array.
+"""
+import math
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"SUDK"
+VERSION = 1
+# magic, version, encoding, grid width, padded to 16 bytes
+HEADER = struct.Struct("<4sBBH8x")
+HEADER_SIZE = HEADER.size
+NIBBLES = 0
+BYTES = 1
+# text layouts
+LAYOUTS = ("auto", "line", "grid")
+# the number of records packed and unpacked at a time
+CHUNK_SIZE = 4096
+ASCII_ZERO = ord("0")
+DOTS_TO_ZEROS = bytes.maketrans(b".", b"0")
+SEPARATOR_CHARS = set("-+=| \t")
+STDOUT_FILENO = 1
+
+
+def read_puzzles(lines, layout="auto"):
+    """
+    Parses text puzzles lazily.
+    :param lines: an iterable of lines, such as an open file
+    :param layout: "line" for one puzzle per line, "grid" for puzzles of one row per
+    line, or "auto" to tell them apart by the number of cells of each line: lines of
+    81 or more cells that make up a whole sudoku are puzzles, shorter lines are rows
+    of a grid. 4x4 puzzles on one line need "line", and grids of 81x81 or more need
+    "grid".
+    :return: a generator of sudokus (2-d numpy arrays)
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout: {layout!r}")
+    rows = []
+    grid_start = None
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            if rows:
+                raise ValueError(
+                    f"line {grid_start}: a grid of {len(rows[0])} columns has only "
+                    f"{len(rows)} rows"
+                )
+            continue
+        if set(line) <= SEPARATOR_CHARS:
+            continue
+        values = parse_cells(line.replace("|", " "))
+        n_cells = values.shape[0]
+        is_puzzle = layout == "line" or (
+            layout == "auto" and not rows and n_cells >= 81 and _grid_width(n_cells)
+        )
+        if is_puzzle:
+            grid_width = _grid_width(n_cells)
+            if grid_width is None:
+                raise ValueError(f"line {line_number}: {n_cells} cells is not a sudoku")
+            _check_range(values, grid_width, line_number)
+            yield values.reshape(grid_width, grid_width)
+            continue
+        if not rows:
+            grid_start = line_number
+            if math.isqrt(n_cells) ** 2 != n_cells:
+                raise ValueError(f"line {line_number}: {n_cells} columns is not a sudoku")
+        elif n_cells != rows[0].shape[0]:
+            raise ValueError(
+                f"line {line_number}: expected {rows[0].shape[0]} cells, got {n_cells}"
+            )
+        _check_range(values, n_cells, line_number)
+        rows.append(values)
+        if len(rows) == n_cells:
+            yield np.stack(rows)
+            rows = []
+    if rows:
+        raise ValueError(
+            f"line {grid_start}: a grid of {len(rows[0])} columns has only "
+            f"{len(rows)} rows"
+        )
+
+
+def parse_cells(text):
+    """
+    :param text: the cells of a line, either as digits and dots, or as numbers
+    separated by spaces or commas (where . also means an empty cell)
+    :return: the cells as a 1-d numpy array, 0 for empty cells
+    """
+    if "," in text or " " in text or "\t" in text:
+        return np.array(
+            [0 if n == "." else int(n) for n in text.replace(",", " ").split()],
+            dtype=np.int64,
+        )
+    # one cell per character: convert the whole line at once
+    digits = text.encode("ascii").translate(DOTS_TO_ZEROS)
+    if not digits.isdigit():
+        raise ValueError(f"not a row of digits: {text!r}")
+    return (np.frombuffer(digits, dtype=np.uint8) - ASCII_ZERO).astype(np.int64)
+
+
+def format_puzzle(sudoku):
+    """
+    :return: the sudoku as a single line, in the format read_puzzles() accepts.
+    """
+    if sudoku.shape[0] == 9:
+        return (sudoku.ravel() + ASCII_ZERO).astype(np.uint8).tobytes().decode("ascii")
+    return " ".join(str(n) for n in sudoku.ravel())
+
+
+def format_grid(sudoku):
+    """
+    :return: the sudoku as lines of rows with dots for empty cells and lines between
+    the blocks, in the format read_puzzles() accepts.
+    """
+    grid_width = sudoku.shape[0]
+    block_width = math.isqrt(grid_width)
+    width = len(str(grid_width))
+    cells = [
+        [str(n).rjust(width) if n else ".".rjust(width) for n in row]
+        for row in sudoku.tolist()
+    ]
+    block_length = block_width * (width + 1) - 1
+    separator = "+".join(["-" * (block_length + 2)] * block_width)[1:-1]
+    lines = []
+    for r, row in enumerate(cells):
+        if r and not r % block_width:
+            lines.append(separator)
+        blocks = [
+            " ".join(row[c:c + block_width]) for c in range(0, grid_width, block_width)
+        ]
+        lines.append(" | ".join(blocks))
+    return "\n".join(lines)
+
+
+def write_puzzles(sudokus, file, layout="line"):
+    """
+    Writes the sudokus as they come, one per line or as grids separated by blank
+    lines. None is written as "unsolvable" so results line up with their puzzles.
+    Sudokus smaller than 9x9 are always written as grids, since read_puzzles() would
+    take one of them on a line for a grid row.
+    :param file: an open text file
+    :return: the number of sudokus written
+    """
+    count = 0
+    for sudoku in sudokus:
+        if sudoku is None:
+            text = "unsolvable"
+        elif layout == "grid" or sudoku.shape[0] < 9:
+            text = format_grid(sudoku) + "\n"
+        else:
+            text = format_puzzle(sudoku)
+        file.write(text + "\n")
+        count += 1
+    return count
+
+
+def write_binary(sudokus, file, grid_width=None):
+    """
+    Writes the sudokus in the binary format as they come. They must all have the
+    same size. None is written as an empty grid so results line up with their
+    puzzles.
+    :param file: an open binary file
+    :param grid_width: the size of the sudokus, defaults to the size of the first
+    one. It is needed if the first sudoku is None.
+    :return: the number of sudokus written
+    """
+    count = 0
+    encoding = None
+    # records are packed and written CHUNK_SIZE at a time
+    chunk = []
+    for sudoku in sudokus:
+        if grid_width is None:
+            if sudoku is None:
+                raise ValueError("grid_width is needed when the first sudoku is None")
+            grid_width = sudoku.shape[0]
+        if encoding is None:
+            encoding = _write_header(file, grid_width)
+        if sudoku is None:
+            sudoku = np.zeros((grid_width, grid_width), dtype=np.uint8)
+        elif sudoku.shape != (grid_width, grid_width):
+            raise ValueError(
+                f"expected a {grid_width}x{grid_width} sudoku, got {sudoku.shape}"
+            )
+        chunk.append(sudoku)
+        if len(chunk) == CHUNK_SIZE:
+            file.write(pack(np.stack(chunk), encoding).tobytes())
+            chunk = []
+        count += 1
+    if chunk:
+        file.write(pack(np.stack(chunk), encoding).tobytes())
+    if encoding is None and grid_width is not None:
+        _write_header(file, grid_width)
+    return count
+
+
+def pack(sudokus, encoding):
+    """
+    :param sudokus: an (n, N, N) array of sudokus
+    :return: their (n, record size) uint8 records
+    """
+    cells = sudokus.reshape(sudokus.shape[0], -1).astype(np.uint8)
+    if encoding == BYTES:
+        return cells
+    if cells.shape[1] % 2:
+        cells = np.pad(cells, ((0, 0), (0, 1)))
+    return (cells[:, 0::2] << 4) | cells[:, 1::2]
+
+
+def unpack(records, grid_width, encoding):
+    """
+    :param records: an (n, record size) uint8 array of records
+    :return: the (n, N, N) uint8 sudokus. Byte records are viewed, not copied.
+    """
+    n_cells = grid_width * grid_width
+    if encoding == BYTES:
+        return records.reshape(-1, grid_width, grid_width)
+    cells = np.empty((records.shape[0], 2 * records.shape[1]), dtype=np.uint8)
+    cells[:, 0::2] = records >> 4
+    cells[:, 1::2] = records & 0x0F
+    return cells[:, :n_cells].reshape(-1, grid_width, grid_width)
+
+
+def map_binary(path):
+    """
+    Memory-maps a binary puzzle file.
+    :return: a (grid_width, encoding, records) tuple, records being a read-only
+    (n, record size) uint8 memmap of the file
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError(f"{path} is not a binary puzzle file")
+    _, version, encoding, grid_width = HEADER.unpack(header)
+    if version != VERSION or encoding not in (NIBBLES, BYTES):
+        raise ValueError(f"{path}: unsupported version {version}, encoding {encoding}")
+    n_cells = grid_width * grid_width
+    record_size = n_cells if encoding == BYTES else (n_cells + 1) // 2
+    if os.path.getsize(path) == HEADER_SIZE:
+        # there's nothing to map
+        return grid_width, encoding, np.empty((0, record_size), dtype=np.uint8)
+    records = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE)
+    if records.shape[0] % record_size:
+        raise ValueError(f"{path} ends with a partial record")
+    return grid_width, encoding, records.reshape(-1, record_size)
+
+
+def load_binary(path):
+    """
+    :return: all the sudokus of a binary puzzle file as an (n, N, N) uint8 array,
+    which is a view of the memory-mapped file for byte records, and is unpacked in
+    memory for nibble records
+    """
+    grid_width, encoding, records = map_binary(path)
+    return unpack(records, grid_width, encoding)
+
+
+def read_binary(path, chunksize=CHUNK_SIZE):
+    """
+    Iterates over the sudokus of a binary puzzle file, unpacking chunksize of them
+    at a time, so memory stays bounded however large the file is.
+    :return: a generator of sudokus (2-d uint8 numpy arrays). They are read-only
+    views, of the file itself for byte records.
+    """
+    grid_width, encoding, records = map_binary(path)
+    for start in range(0, records.shape[0], chunksize):
+        yield from unpack(records[start:start + chunksize], grid_width, encoding)
+
+
+def is_binary(path):
+    """
+    :return: whether the file starts like a binary puzzle file
+    """
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_file(path, layout="auto"):
+    """
+    Reads the sudokus of a text or binary puzzle file, telling them apart by the
+    header.
+    :param path: the file, or '-' for text on stdin
+    :param layout: the layout of a text file, see read_puzzles()
+    :return: a generator of sudokus (2-d numpy arrays)
+    """
+    if path == "-":
+        yield from read_puzzles(sys.stdin, layout)
+    elif is_binary(path):
+        yield from read_binary(path)
+    else:
+        with open(path) as lines:
+            yield from read_puzzles(lines, layout)
+
+
+def close_stdout():
+    """
+    Points stdout at os.devnull, for when writing to it raised BrokenPipeError because
+    its reader (such as head) exited early. The interpreter would fail flushing it
+    on exit otherwise.
+    """
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    # by descriptor, since sys.stdout may already be closed
+    os.dup2(devnull, STDOUT_FILENO)
+
+
+def _grid_width(n_cells):
+    """
+    :return: N if n_cells is the number of cells of an NxN sudoku, otherwise None
+    """
+    grid_width = math.isqrt(n_cells)
+    if grid_width * grid_width != n_cells or math.isqrt(grid_width) ** 2 != grid_width:
+        return None
+    return grid_width
+
+
+def _write_header(file, grid_width):
+    """
+    :return: the encoding of the records that follow the header
+    """
+    if grid_width > np.iinfo(np.uint8).max:
+        raise ValueError(f"{grid_width}x{grid_width} grids don't fit in bytes")
+    encoding = NIBBLES if grid_width == 9 else BYTES
+    file.write(HEADER.pack(MAGIC, VERSION, encoding, grid_width))
+    return encoding
+
+
+def _check_range(values, grid_width, line_number):
+    """
+    raises a ValueError if a cell of the line isn't empty or a number from 1 to N
+    """
+    bad = (values < 0) | (values > grid_width)
+    if bad.any():
+        raise ValueError(
+            f"line {line_number}: {values[bad.argmax()]} is not a number of a "
+            f"{grid_width}x{grid_width} sudoku"
+        )
@@ -0,0 +1,94 @@
+import numpy as np
+
+# operation_type of a step, indexed by its action (0 deselects a row, 1 selects it)
+OPERATIONS = ("rem", "ins")
+# number of steps CompactPath decodes at a time while it is iterated over
+DECODE_CHUNK = 4096
+
+
+class CompactPath:
+    """
+    Records the solving path as one int32 per step, encoding (action, cover_row) as
+    cover_row << 1 | action, in a preallocated array that doubles in size when full.
+    Iterating over it decodes the steps into (operation_type, row, col, n) tuples,
+    where "ins" means the algorithm inserted number "n" into sudoku[row, col] and
+    "rem" means it removed it again.
+    """
+
+    def __init__(self, possibilities, capacity=4096):
+        """
+        :param possibilities: the possibilities of the cover the steps refer to
+        :param capacity: the number of steps to allocate room for up front
+        """
+        self.possibilities = possibilities
+        self._codes = np.empty(capacity, dtype=np.int32)
+        self._length = 0
+
+    def append(self, step):
+        action, cover_row = step
+        if self._length == self._codes.shape[0]:
+            codes = np.empty(2 * self._length, dtype=np.int32)
+            codes[:self._length] = self._codes
+            self._codes = codes
+        self._codes[self._length] = cover_row << 1 | action
+        self._length += 1
+
+    @property
+    def codes(self):
+        """
+        :return: the encoded steps recorded so far
+        """
+        return self._codes[:self._length]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        # decode a chunk at a time so a long path is never expanded all at once
+        for start in range(0, self._length, DECODE_CHUNK):
+            codes = self._codes[start:min(start + DECODE_CHUNK, self._length)]
+            steps = self.possibilities[codes >> 1]
+            for action, row, col, n in zip(
+                (codes & 1).tolist(),
+                steps["row"].tolist(),
+                steps["col"].tolist(),
+                steps["n"].tolist(),
+            ):
+                yield OPERATIONS[action], row, col, n
+
+
+class StreamingPath:
+    """
+    Passes each step of the solving path to a callback as soon as it is taken, as
+    callback(operation_type, row, col, n), instead of keeping it. To feed a
+    generator, prime it with next() and pass its send method wrapped in a lambda.
+    """
+
+    def __init__(self, possibilities, callback):
+        """
+        :param possibilities: the possibilities of the cover the steps refer to
+        :param callback: called with the (operation_type, row, col, n) of every step
+        """
+        self.possibilities = possibilities
+        self.callback = callback
+
+    def append(self, step):
+        action, cover_row = step
+        row, col, n = self.possibilities[cover_row].item()
+        self.callback(OPERATIONS[action], row, col, n)
+
+
+def path_recorder(path, possibilities):
+    """
+    :param path: how to record the solving path: None (or "off") to not record it,
+    "compact" for a CompactPath, or a callback for a StreamingPath
+    :param possibilities: the possibilities of the cover the steps refer to
+    :return: the recorder the solvers append (action, cover_row) steps to, or None
+    """
+    if path is None or path == "off":
+        return None
+    if path == "compact":
+        return CompactPath(possibilities)
+    if callable(path):
+        return StreamingPath(possibilities, path)
+    raise ValueError(f"unknown path recording: {path!r}")
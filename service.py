@@ -0,0 +1,570 @@
+"""
+Serves sudoku solving over HTTP/JSON on localhost.
+Usage: python service.py [--port PORT] [--workers WORKERS] [--engine ENGINE]
+
+POST /solve takes {"puzzle": PUZZLE} or {"puzzles": [PUZZLE, ...]}, optionally with
+"timeout" (seconds) and "node_budget", each capped by the server's own limits. A
+PUZZLE is an 81 character string (0 or . for empty cells), a list of the N*N numbers
+of an NxN grid, or a list of its N rows. Each puzzle gets back {"status": STATUS,
+"solution": ROWS}, where STATUS is "solved", "unsolvable", "timeout" or
+"node_budget", and ROWS is null unless it was solved.
+GET /metrics returns throughput, latency and batching figures as JSON.
+
+Concurrent requests are coalesced into micro-batches and solved on a pool of worker
+processes. Each puzzle of a batch first gets BATCH_SLICE seconds; the ones that need
+longer are sent back and solved as tasks of their own, so a hard puzzle doesn't hold
+up the easy ones it was batched with. The queue of waiting puzzles is bounded, and a
+request that doesn't fit is turned away with 503 so callers can back off.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import traceback
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import bitboard
+import sudoku
+from cover import column_rows, cover_template, create_cover
+from puzzle_io import read_puzzles
+
+# the engines that can be stopped part way, which the budgets rely on
+ENGINES = ("bitboard", "algx")
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_NODE_BUDGET = 1_000_000
+# most puzzles sent to a worker at once, and how long (in seconds) the first puzzle
+# of a batch waits for others to join it
+MAX_BATCH = 64
+BATCH_WINDOW = 0.002
+# seconds each puzzle of a batch gets before it is split off into a task of its own
+BATCH_SLICE = 0.05
+# most puzzles waiting for a worker before requests are turned away
+MAX_QUEUE = 10_000
+# extra seconds a request waits for its worker past its own timeout
+TIMEOUT_GRACE = 1.0
+MAX_BODY = 16 * 2 ** 20
+# the number of recent requests the latency percentiles are taken over, and the
+# number of seconds the recent throughput is measured over
+LATENCY_WINDOW = 10_000
+THROUGHPUT_WINDOW = 10.0
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+# the status of a puzzle that ran out of its batch slice, see _solve_batch(). Its
+# result carries the nodes it spent in place of the solution.
+DEFERRED = "deferred"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    """
+    Throughput and latency of the service, as reported by GET /metrics.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.rejected = 0
+        self.bad_requests = 0
+        self.statuses = Counter()
+        self.batches = 0
+        self.batched_puzzles = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.finished = deque()
+
+    def on_request(self, latency, results):
+        now = time.monotonic()
+        self.requests += 1
+        self.latencies.append(latency)
+        self.statuses.update(status for status, _ in results)
+        self.finished.extend([now] * len(results))
+        while self.finished and self.finished[0] < now - THROUGHPUT_WINDOW:
+            self.finished.popleft()
+
+    def on_batch(self, size):
+        self.batches += 1
+        self.batched_puzzles += size
+
+    def as_dict(self):
+        uptime = time.monotonic() - self.started
+        if self.latencies:
+            p50, p90, p99 = np.percentile(self.latencies, [50, 90, 99]) * 1000
+            worst = max(self.latencies) * 1000
+        else:
+            p50 = p90 = p99 = worst = 0.0
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "bad_requests": self.bad_requests,
+            "puzzles": dict(self.statuses),
+            "puzzles_per_s": sum(self.statuses.values()) / uptime,
+            "recent_puzzles_per_s": len(self.finished) / min(uptime, THROUGHPUT_WINDOW),
+            "latency_ms": {"p50": p50, "p90": p90, "p99": p99, "max": worst},
+            "batches": self.batches,
+            "mean_batch_size": self.batched_puzzles / self.batches if self.batches else 0,
+        }
+
+
+class SolverService:
+    """
+    Queues puzzles, sends them to the workers in micro-batches and serves HTTP.
+    """
+
+    def __init__(
+        self,
+        workers=None,
+        engine="bitboard",
+        timeout=DEFAULT_TIMEOUT,
+        node_budget=DEFAULT_NODE_BUDGET,
+        max_batch=MAX_BATCH,
+        batch_window=BATCH_WINDOW,
+        max_queue=MAX_QUEUE,
+        batch_slice=BATCH_SLICE,
+    ):
+        """
+        :param workers: number of worker processes, defaults to the number of CPUs
+        :param engine: the engine the workers solve with, one of ENGINES
+        :param timeout: the default and largest timeout of a request, in seconds
+        :param node_budget: the default and largest node budget of a puzzle
+        :param batch_slice: seconds each puzzle of a batch of several gets before it
+        is solved on its own instead, None to solve every batch in one go
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine: {engine!r}")
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.timeout = timeout
+        self.node_budget = node_budget
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.batch_slice = batch_slice
+        self.metrics = Metrics()
+        self._queue = asyncio.Queue(max_queue)
+        # one batch in flight per worker, so puzzles wait in the bounded queue rather
+        # than in the executor's, and coalesce into bigger batches under load.
+        # Deferred puzzles take a slot each too, and count towards the queue's size
+        # while they wait for it.
+        self._slots = asyncio.Semaphore(self.workers)
+        self._deferred = 0
+        self._executor = None
+        self._dispatcher = None
+        self._running = set()
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        if self._running:
+            await asyncio.wait(self._running)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def solve(self, puzzles, timeout=None, node_budget=None):
+        """
+        Queues the puzzles and waits for their results.
+        :param puzzles: a list of sudokus (2-d numpy arrays)
+        :param timeout: seconds after which unsolved puzzles are given up on
+        :param node_budget: the most search nodes spent on each puzzle
+        :return: a (status, solution) tuple for each puzzle, see the module docstring
+        :raises HTTPError: with status 503 if the queue has no room for the puzzles,
+        and with status 400 if a worker found a puzzle to be malformed
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        node_budget = self.node_budget if node_budget is None else min(
+            node_budget, self.node_budget
+        )
+        if not puzzles:
+            return []
+        waiting = self._queue.qsize() + self._deferred
+        if self._queue.maxsize - waiting < len(puzzles):
+            self.metrics.rejected += 1
+            raise HTTPError(503, "too many puzzles queued, retry later")
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        futures = []
+        for puzzle in puzzles:
+            future = loop.create_future()
+            self._queue.put_nowait((puzzle, deadline, node_budget, future))
+            futures.append(future)
+        # the workers stop at the deadline themselves, the grace only covers the
+        # time it takes to hear back from them
+        await asyncio.wait(futures, timeout=timeout + TIMEOUT_GRACE)
+        results = []
+        for future in futures:
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(("timeout", None))
+        return results
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self._queue.get()]
+            await self._slots.acquire()
+            self._take(batch)
+            if len(batch) < self.max_batch and self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+                self._take(batch)
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _take(self, batch):
+        """
+        moves queued puzzles to the batch, up to max_batch of them
+        """
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _run(self, batch):
+        deferred = []
+        try:
+            # skip the puzzles whose request already gave up on them
+            batch = [job for job in batch if not job[3].done()]
+            if not batch:
+                return
+            self.metrics.on_batch(len(batch))
+            jobs = [(puzzle, deadline, budget) for puzzle, deadline, budget, _ in batch]
+            batch_slice = self.batch_slice if len(batch) > 1 else None
+            results = await self._submit(jobs, batch_slice, batch)
+            if results is None:
+                return
+            for (puzzle, deadline, budget, future), result in zip(batch, results):
+                if isinstance(result, tuple) and result[0] == DEFERRED:
+                    # the nodes already spent come out of the budget
+                    deferred.append((puzzle, deadline, budget - result[1], future))
+                else:
+                    _resolve(future, result)
+            self._deferred += len(deferred)
+        finally:
+            self._slots.release()
+        # the puzzles that outran their slice are solved one per task, each waiting
+        # for a slot of its own, so they don't hold up the rest of their batch
+        await asyncio.gather(*(self._run_deferred(job) for job in deferred))
+
+    async def _run_deferred(self, job):
+        async with self._slots:
+            self._deferred -= 1
+            if not job[3].done():
+                await self._submit([job[:3]], None, [job])
+
+    async def _submit(self, jobs, batch_slice, batch):
+        """
+        solves the jobs on a worker
+        :return: their results, None if the worker failed, in which case the futures
+        of the batch are failed with its error
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, _solve_batch, jobs, self.engine, batch_slice
+            )
+        except Exception as error:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return None
+        if batch_slice is None:
+            for (*_, future), result in zip(batch, results):
+                _resolve(future, result)
+        return results
+
+    async def handle(self, reader, writer):
+        """
+        serves the HTTP/1.1 requests of one connection, keeping it open between
+        requests unless the client asks otherwise
+        """
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    status, payload = await self._route(method, target, body)
+                except HTTPError as error:
+                    if error.status == 400:
+                        self.metrics.bad_requests += 1
+                    headers = {"connection": "close"}
+                    status, payload = error.status, {"error": str(error)}
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as error:
+                    traceback.print_exc(file=sys.stderr)
+                    headers = {"connection": "close"}
+                    status, payload = 500, {"error": f"internal error: {error}"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, body):
+        path = target.split("?", 1)[0]
+        if path == "/metrics":
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return 200, self.metrics.as_dict()
+        if path != "/solve":
+            raise HTTPError(404, f"no such endpoint: {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        start = time.monotonic()
+        try:
+            request = json.loads(body)
+            single = "puzzle" in request
+            puzzles = [request["puzzle"]] if single else request["puzzles"]
+            puzzles = [parse_puzzle(puzzle) for puzzle in puzzles]
+            timeout = request.get("timeout")
+            node_budget = request.get("node_budget")
+            timeout = None if timeout is None else float(timeout)
+            node_budget = None if node_budget is None else int(node_budget)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            raise HTTPError(400, f"bad request: {error}")
+        results = await self.solve(puzzles, timeout, node_budget)
+        self.metrics.on_request(time.monotonic() - start, results)
+        results = [{"status": status, "solution": rows} for status, rows in results]
+        return 200, results[0] if single else {"results": results}
+
+
+def parse_puzzle(puzzle):
+    """
+    :param puzzle: an 81 character string, a list of the N*N numbers of an NxN grid,
+    or a list of its N rows
+    :return: the sudoku (2-d numpy array)
+    :raises ValueError: if it isn't a sudoku
+    """
+    if isinstance(puzzle, str):
+        sudokus = list(read_puzzles([puzzle]))
+        if len(sudokus) != 1:
+            raise ValueError("expected one puzzle")
+        sudoku = sudokus[0]
+    else:
+        sudoku = np.array(puzzle, dtype=np.int64)
+    if sudoku.ndim == 1:
+        grid_width = math.isqrt(sudoku.shape[0])
+        if grid_width * grid_width != sudoku.shape[0]:
+            raise ValueError(f"{sudoku.shape[0]} cells is not a sudoku")
+        sudoku = sudoku.reshape(grid_width, grid_width)
+    if sudoku.ndim != 2 or sudoku.shape[0] != sudoku.shape[1]:
+        raise ValueError("a sudoku must be a square grid")
+    grid_width = sudoku.shape[0]
+    if math.isqrt(grid_width) ** 2 != grid_width:
+        raise ValueError(f"a {grid_width}x{grid_width} grid has no square blocks")
+    if sudoku.min() < 0 or sudoku.max() > grid_width:
+        raise ValueError(f"numbers must be between 0 and {grid_width}")
+    return sudoku
+
+
+def _resolve(future, result):
+    """
+    sets the future to the (status, solution) result of its puzzle, or to the error
+    the worker hit on it. A ValueError means the puzzle was malformed.
+    """
+    if future.done():
+        return
+    if isinstance(result, ValueError):
+        future.set_exception(HTTPError(400, f"bad puzzle: {result}"))
+    elif isinstance(result, Exception):
+        future.set_exception(result)
+    else:
+        future.set_result(result)
+
+
+def _init_worker():
+    # build the 9x9 tables up front so the first requests don't pay for them
+    bitboard.geometry(9, 3)
+    cover_template(9, 3)
+
+
+def _solve_batch(jobs, engine, batch_slice=None):
+    """
+    Runs in a worker process. Each job is solved on its own, so an error solving one
+    of them is returned in place of its result instead of failing the others.
+    :param batch_slice: seconds each job gets, past which it is given up on with the
+    DEFERRED status so it can be solved on its own, with (DEFERRED, nodes spent) as
+    its result. None gives them all the time they need.
+    :return: the (status, solution) of each (puzzle, deadline, node_budget) job, or
+    the exception solving it raised
+    """
+    results = []
+    for puzzle, deadline, budget in jobs:
+        try:
+            results.append(_solve_job(puzzle, deadline, budget, engine, batch_slice))
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+def _solve_job(puzzle, deadline, node_budget, engine, batch_slice=None):
+    """
+    Solves the puzzle unless it runs past the deadline (on the time.monotonic() clock)
+    or spends more than node_budget nodes: rows selected by algx, branches taken by
+    bitboard. The budget is checked every STOP_CHECK_INTERVAL nodes of the engine.
+    :param batch_slice: seconds after which the puzzle is given up on with the
+    DEFERRED status, unless its deadline comes first
+    """
+    now = time.monotonic()
+    if now >= deadline:
+        return "timeout", None
+    slice_end = None if batch_slice is None else now + batch_slice
+    grid_width = puzzle.shape[0]
+    block_width = math.isqrt(grid_width)
+    if engine == "bitboard":
+        interval = bitboard.STOP_CHECK_INTERVAL
+    else:
+        interval = sudoku.STOP_CHECK_INTERVAL
+    checks = 0
+    reason = None
+
+    def stop():
+        nonlocal checks, reason
+        checks += 1
+        now = time.monotonic()
+        if checks * interval >= node_budget:
+            reason = "node_budget"
+        elif now >= deadline:
+            reason = "timeout"
+        elif slice_end is not None and now >= slice_end:
+            reason = DEFERRED
+        return reason is not None
+
+    if engine == "bitboard":
+        grid = [int(n) for n in puzzle.ravel()]
+        solved = bitboard.solve(grid, None, grid_width, block_width, stop=stop)
+        completed_sudoku = np.array(grid).reshape(puzzle.shape)
+    else:
+        cover, possibilities = create_cover(puzzle, grid_width, block_width)
+        n_cols = 4 * grid_width * grid_width
+        solution = []
+        solved = sudoku.solve(
+            cover,
+            column_rows(cover, n_cols),
+            np.ones(cover.shape[0], dtype=bool),
+            np.ones(n_cols, dtype=bool),
+            solution,
+            None,
+            stop=stop,
+        )
+        if solved:
+            completed_sudoku = sudoku.build_final_sudoku(possibilities, solution, puzzle)
+    if solved:
+        return "solved", completed_sudoku.tolist()
+    if reason == DEFERRED:
+        return DEFERRED, checks * interval
+    return reason or "unsolvable", None
+
+
+async def _read_request(reader):
+    """
+    :return: the (method, target, headers, body) of the next request on the
+    connection, or None once the client closed it
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"bodies are limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def _write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        + body
+    )
+
+
+async def serve(service, host="127.0.0.1", port=8080):
+    """
+    runs the service until it is cancelled
+    """
+    service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"listening on http://{host}:{port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--engine", choices=ENGINES, default="bitboard")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--node-budget", type=int, default=DEFAULT_NODE_BUDGET)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    args = parser.parse_args()
+    service = SolverService(
+        workers=args.workers,
+        engine=args.engine,
+        timeout=args.timeout,
+        node_budget=args.node_budget,
+        max_batch=args.max_batch,
+        batch_window=args.batch_window,
+        max_queue=args.max_queue,
+    )
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+A sudoku being filled in one number at a time, as in an interactive app. The cover of
+the empty grid and its active rows and columns are kept between edits, so placing or
+removing a number only touches the rows of its 4 columns instead of rebuilding the
+cover and solving from scratch.
+"""
+import numpy as np
+
+from cover import column_rows, cover_template
+from sudoku import REMOVED_COUNT, col_counts, min_col, solve
+
+
+class SolverSession:
+    """
+    Holds a sudoku with the cover of its geometry. Every number placed covers its 4
+    columns, which removes the rows that conflict with it; a row is active as long as
+    none of its columns is covered, so numbers can be removed in any order, unlike the
+    last-in first-out undo of the search.
+    The last solution found is kept, and reused as long as every placed number agrees
+    with it, so checking and hinting only search again after a number that disagrees
+    with it.
+    """
+
+    def __init__(self, sudoku: np.array, grid_width=9, block_width=3):
+        """
+        :param sudoku: the starting sudoku (2-d numpy array). Its non-zero numbers are
+        givens, which can't be removed.
+        """
+        self.grid_width = grid_width
+        self.block_width = block_width
+        self.cover, self.possibilities = cover_template(grid_width, block_width)
+        self.n_cols = 4 * grid_width * grid_width
+        self.col_rows = column_rows(self.cover, self.n_cols)
+        self.active_rows = np.ones(self.cover.shape[0], dtype=bool)
+        self.active_cols = np.ones(self.n_cols, dtype=bool)
+        # the number of active rows in each column, with REMOVED_COUNT added to
+        # covered columns as in the search
+        self.counts = col_counts(self.cover, self.active_rows, self.n_cols)
+        self.grid = np.zeros((grid_width, grid_width), dtype=np.int64)
+        # placed numbers that conflict with others, by cell. They are in the grid but
+        # their row isn't selected until the numbers they conflict with are removed.
+        self.conflicts = {}
+        # the last solution found, or None, and whether the placed numbers are known
+        # to have no solution. The solution is kept when a number disagrees with it,
+        # since correcting that number makes it good again.
+        self.solution = None
+        self.unsolvable = False
+        self.givens = np.zeros((grid_width, grid_width), dtype=bool)
+        rows, cols = sudoku.nonzero()
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            self.place(row, col, int(sudoku[row, col]))
+        self.givens = sudoku != 0
+
+    def place(self, row, col, n):
+        """
+        Puts n in a cell, replacing the number already in it.
+        :return: False if n conflicts with a number in its row, column or block. It is
+        placed all the same, and the session is inconsistent until one of them is
+        removed.
+        """
+        if not 1 <= n <= self.grid_width:
+            raise ValueError(f"{n} is not a number of a {self.grid_width}x"
+                             f"{self.grid_width} sudoku")
+        if self.grid[row, col]:
+            self.unplace(row, col)
+        self.grid[row, col] = n
+        r = self._row(row, col, n)
+        if not self.active_rows[r]:
+            self.conflicts[row, col] = n
+            return False
+        self._select(r)
+        return True
+
+    def unplace(self, row, col):
+        """
+        Empties a cell.
+        :return: the number that was in it, 0 if it was empty
+        """
+        if self.givens[row, col]:
+            raise ValueError(f"cell ({row}, {col}) is a given")
+        n = int(self.grid[row, col])
+        if not n:
+            return 0
+        self.grid[row, col] = 0
+        # fewer numbers can't take away a solution, but can give one back
+        self.unsolvable = False
+        if self.conflicts.pop((row, col), None) is None:
+            self._deselect(self._row(row, col, n))
+            # numbers that conflicted with this one may fit now
+            for (r, c), m in list(self.conflicts.items()):
+                row_ = self._row(r, c, m)
+                if self.active_rows[row_]:
+                    del self.conflicts[r, c]
+                    self._select(row_)
+        return n
+
+    def is_consistent(self):
+        """
+        :return: whether the placed numbers can be completed into a solution. It only
+        searches if the last solution found disagrees with them, starting from the
+        current rows and columns, so the cover isn't rebuilt.
+        """
+        if self.conflicts or self.unsolvable:
+            return False
+        if self.solution is not None:
+            placed = self.grid != 0
+            if (self.grid[placed] == self.solution[placed]).all():
+                return True
+        # a column with no rows left can't be covered
+        if min_col(self.counts)[1] == 0:
+            self.unsolvable = True
+            return False
+        selected = []
+        found = solve(
+            self.cover,
+            self.col_rows,
+            self.active_rows.copy(),
+            self.active_cols.copy(),
+            selected,
+            None,
+        )
+        if not found:
+            self.unsolvable = True
+            return False
+        solution = self.grid.copy()
+        names = self.possibilities[selected]
+        solution[names["row"], names["col"]] = names["n"]
+        self.solution = solution
+        return True
+
+    def hint(self):
+        """
+        :return: a (row, col, n) number to place next, or None if the sudoku is full or
+        inconsistent. A cell with one candidate left, or a number with one place left
+        in a row, column or block, is given first, since it can be found by hand.
+        """
+        if not self.is_consistent():
+            return None
+        col, count = min_col(self.counts)
+        if count >= REMOVED_COUNT:
+            return None
+        indptr, indices = self.col_rows
+        rows = indices[indptr[col]:indptr[col + 1]]
+        rows = rows[self.active_rows[rows]]
+        if count > 1:
+            # nothing is forced, so the cell comes from the solution
+            names = self.possibilities[rows]
+            rows = rows[self.solution[names["row"], names["col"]] == names["n"]]
+        name = self.possibilities[rows[0]]
+        return int(name["row"]), int(name["col"]), int(name["n"])
+
+    def candidates(self, row, col):
+        """
+        :return: the numbers that can go in the cell without conflicting with the
+        numbers placed, or the number placed in it
+        """
+        if self.grid[row, col]:
+            return [int(self.grid[row, col])]
+        start = self._row(row, col, 1)
+        active = self.active_rows[start:start + self.grid_width].copy()
+        # conflicting numbers are in the grid but their columns aren't covered
+        block = (row // self.block_width, col // self.block_width)
+        for (r, c), n in self.conflicts.items():
+            if r == row or c == col or (
+                (r // self.block_width, c // self.block_width) == block
+            ):
+                active[n - 1] = False
+        return (np.flatnonzero(active) + 1).tolist()
+
+    def _row(self, row, col, n):
+        # the rows of the template are in row-major cell order, then by number
+        return (row * self.grid_width + col) * self.grid_width + n - 1
+
+    def _select(self, r):
+        """
+        covers the columns of row r and removes the rows with a 1 in them
+        """
+        indptr, indices = self.col_rows
+        columns = self.cover[r]
+        rows = np.concatenate(
+            [indices[indptr[col]:indptr[col + 1]] for col in columns.tolist()]
+        )
+        rows = np.unique(rows[self.active_rows[rows]])
+        self.active_rows[rows] = False
+        np.subtract.at(self.counts, self.cover[rows], 1)
+        self.active_cols[columns] = False
+        self.counts[columns] += REMOVED_COUNT
+
+    def _deselect(self, r):
+        """
+        uncovers the columns of row r and restores the rows with a 1 in them that have
+        no other covered column
+        """
+        indptr, indices = self.col_rows
+        columns = self.cover[r]
+        self.active_cols[columns] = True
+        self.counts[columns] -= REMOVED_COUNT
+        rows = np.unique(np.concatenate(
+            [indices[indptr[col]:indptr[col + 1]] for col in columns.tolist()]
+        ))
+        rows = rows[self.active_cols[self.cover[rows]].all(axis=1)]
+        self.active_rows[rows] = True
+        np.add.at(self.counts, self.cover[rows], 1)
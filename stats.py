@@ -0,0 +1,187 @@
+from timeit import default_timer as timer
+
+# the search functions SolveStats can time
+PROFILED = ("min_col", "select", "deselect")
+
+
+class SolveStats:
+    """
+    Collects what an algorithm-x search did. Pass one to sudoku.solve_sudoku() (or to
+    the solve() functions) and read it once the search is over. The search calls the
+    on_* methods as it goes, so they double as hooks: subclass SolveStats and
+    override them to watch the search, calling super() to keep the counts. Without a
+    SolveStats the search skips all of this.
+    """
+
+    def __init__(self, profile_interval=None):
+        """
+        :param profile_interval: time one in this many calls of min_col(), select()
+        and deselect(), or None to not time them. 1 times every call, which slows the
+        search down noticeably; larger intervals sample the hot path instead.
+        """
+        self.profile_interval = profile_interval
+        # rows selected, rows deselected on backtracking, columns found with no rows
+        # left and solutions found
+        self.nodes = 0
+        self.backtracks = 0
+        self.dead_ends = 0
+        self.solutions = 0
+        # depth_histogram[d] is the number of rows selected at depth d, branchings[d]
+        # the number of columns branched on at depth d and candidates[d] their total
+        # number of candidate rows. The depth of a node is the number of rows
+        # selected on the way to it, so the root is at depth 0 and the rows selected
+        # there are too.
+        self.depth_histogram = []
+        self.branchings = []
+        self.candidates = []
+        self.calls = dict.fromkeys(PROFILED, 0)
+        self.timed_calls = dict.fromkeys(PROFILED, 0)
+        self.times = dict.fromkeys(PROFILED, 0.0)
+
+    def on_branch(self, depth, col, n_candidates):
+        """
+        called when the search branches on column col, which has n_candidates rows
+        """
+        _grow(self.branchings, depth)
+        _grow(self.candidates, depth)
+        self.branchings[depth] += 1
+        self.candidates[depth] += n_candidates
+
+    def on_select(self, depth, row):
+        """
+        called when row is selected at depth
+        """
+        self.nodes += 1
+        _grow(self.depth_histogram, depth)
+        self.depth_histogram[depth] += 1
+
+    def on_deselect(self, depth, row):
+        """
+        called when row is deselected to backtrack from depth
+        """
+        self.backtracks += 1
+
+    def on_dead_end(self, depth):
+        """
+        called when a column has no rows left at depth
+        """
+        self.dead_ends += 1
+
+    def on_solution(self, depth):
+        """
+        called when a solution is found at depth
+        """
+        self.solutions += 1
+
+    @property
+    def max_depth(self):
+        return len(self.depth_histogram) - 1 if self.depth_histogram else 0
+
+    def branching_factors(self):
+        """
+        :return: the mean number of candidate rows of the columns branched on at each
+        depth, 0 for depths that never branched
+        """
+        return [
+            candidates / branchings if branchings else 0
+            for branchings, candidates in zip(self.branchings, self.candidates)
+        ]
+
+    def estimated_times(self):
+        """
+        :return: a dict of the estimated seconds spent in each profiled function,
+        scaling the timed calls up to all calls
+        """
+        return {
+            name: self.times[name] * self.calls[name] / self.timed_calls[name]
+            if self.timed_calls[name]
+            else 0.0
+            for name in PROFILED
+        }
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "dead_ends": self.dead_ends,
+            "solutions": self.solutions,
+            "max_depth": self.max_depth,
+            "depth_histogram": self.depth_histogram,
+            "branching_factors": self.branching_factors(),
+            "estimated_times": self.estimated_times(),
+        }
+
+    def profiled(self, name, function):
+        """
+        :return: function, wrapped to time one in profile_interval of its calls
+        under name if profiling is on, otherwise function itself so an unprofiled
+        search pays nothing for it.
+        """
+        if not self.profile_interval:
+            return function
+        interval = self.profile_interval
+        calls = self.calls
+        timed_calls = self.timed_calls
+        times = self.times
+
+        def timed(*args):
+            calls[name] += 1
+            if calls[name] % interval:
+                return function(*args)
+            start = timer()
+            result = function(*args)
+            times[name] += timer() - start
+            timed_calls[name] += 1
+            return result
+
+        return timed
+
+
+class CacheStats:
+    """
+    Counts the lookups of a cache.SolutionCache and the time they took, including
+    finding the canonical form of the sudoku.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0
+
+    @property
+    def lookups(self):
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def mean_lookup_time(self):
+        return self.lookup_time / self.lookups if self.lookups else 0.0
+
+    def on_lookup(self, hit, elapsed):
+        """
+        called after each lookup with whether it hit and how long it took
+        """
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.lookup_time += elapsed
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "mean_lookup_time": self.mean_lookup_time,
+        }
+
+
+def _grow(counts, index):
+    """
+    extends the list of counts with zeros so counts[index] exists
+    """
+    if index >= len(counts):
+        counts.extend([0] * (index + 1 - len(counts)))
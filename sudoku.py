@@ -1,162 +1,216 @@
-import os
+import argparse
 import time
 from timeit import default_timer as timer
 import numpy as np
-from GUI import print_gui, write_Time, init_GUI
+import bitboard
+import dlx
+import sudoku_para
+from cover import create_cover, column_rows
+from recording import path_recorder
 
-def create_cover(sudoku, grid_width=9, block_width=3):
-    """
-    Creates the relationship matrix used by algorithm-x
-    :param sudoku: the sudoku matrix (2-d numpy array)
-    :param grid_width: number of elements in a row
-    :param block_width: number of blocks in a row
-    :return: the relationship matrix (called a cover)
-    """
-    g_len = sudoku.shape[0]  # grid side length
-    n_non_zeros = np.count_nonzero(sudoku)
-    # N_possibilities = #_of_zeros * numbers_per_row + #_of_non_zeros
-    n_possibilities = (g_len * g_len - n_non_zeros) * g_len + n_non_zeros
-    # There are 4 types of constraints and each type has g_len * g_len constraints
-    n_constrains = 4 * g_len * g_len
-    # cover stores the 0-1 relationships that Algorithm-X uses
-    cover = np.zeros((n_possibilities, n_constrains))
-    # possibilities stores the 'name' of a possibility (row, col, number) such that
-    # possibilities[i] is the name for row i in cover. This is used to fill in the
-    # sudoku at the end
-    possibilities = []
-    # iterate over each sudoku element, add possibilities and fill in its corresponding
-    # relationship with each constraint
-    for row in range(g_len):
-        for col in range(g_len):
-            # if (is a starting number in the sudoku grid)
-            if sudoku[row, col] != 0:
-                possibility = (row, col, sudoku[row, col])
-                add_possibility(
-                    possibility,
-                    cover,
-                    len(possibilities),
-                    grid_width=grid_width,
-                    block_width=block_width,
-                )
-                possibilities.append(possibility)
-                continue
-            for n in range(1, grid_width + 1):
-                possibility = (row, col, n)
-                add_possibility(
-                    possibility,
-                    cover,
-                    len(possibilities),
-                    grid_width=grid_width,
-                    block_width=block_width,
-                )
-                possibilities.append(possibility)
-    return cover, possibilities
+# added to the count of a removed column, so min_col() never picks it
+REMOVED_COUNT = 1 << 40
+# the engines solve_sudoku() and count_solutions() can run
+ENGINES = ("algx", "dlx", "bitboard", "para")
+# how many search nodes solve() visits between calls to its stop callback
+STOP_CHECK_INTERVAL = 256
+# the pace main() replays the solving path at
+STEPS_PER_SECOND = 10
+# moves the cursor home and clears the terminal, without running a shell to do it
+CLEAR_SCREEN = "\033[H\033[2J"
 
 
-def add_possibility(possibility, cover, cover_row, grid_width=9, block_width=3):
+class UndoTrail:
     """
-    Adds the possibility and its constraint relationships to the cover matrix.
-    :param possibility: The possibility to add
-    :param cover: The cover matrix
-    :param cover_row: The row in the cover matrix to add the relationships
-    :param grid_width: number of elements in a row
-    :param block_width: number of blocks in a row
+    Preallocated stacks of the rows and columns removed by select(). Every row and
+    column is removed at most once along a search path, so they never overflow, and
+    backtracking restores everything above a mark without allocating anything.
     """
-    row, col, n = possibility
-    # Row-Column constraint
-    cover[cover_row, row * grid_width + col] = 1
-    # Row-Number constraint
-    cover[cover_row, grid_width * grid_width + row * grid_width + n - 1] = 1
-    # Col-Number constraint
-    cover[cover_row, 2 * grid_width * grid_width + col * grid_width + n - 1] = 1
-    # Block-Number constraint
-    # block_idx is the nth block, counting from left to right, top-down
-    block_idx = (row // block_width) * grid_width // block_width + (col // block_width)
-    cover[cover_row, 3 * grid_width * grid_width + block_idx * grid_width + n - 1] = 1
+
+    def __init__(self, n_rows, n_cols):
+        self.rows = np.empty(n_rows, dtype=np.intp)
+        self.cols = np.empty(n_cols, dtype=np.intp)
+        self.row_top = 0
+        self.col_top = 0
 
 
-def solve(cover, active_rows, active_cols, solution: list, solution_path: list):
+def solve(
+    cover,
+    col_rows,
+    active_rows,
+    active_cols,
+    solution: list,
+    solution_path,
+    limit=1,
+    stop=None,
+    stats=None,
+):
     """
     solves the exact cover problem with algorithm-x.
     See https://en.wikipedia.org/wiki/Knuth%27s_Algorithm_X for the high level algorithm
-    :param cover: the cover.
-    :param active_rows: a vector representing which rows haven't and have been removed.
+    The search is iterative: each level of the search tree is a frame on an explicit
+    stack, so the depth is not limited by Python's recursion limit.
+    :param cover: the cover, as an (n_rows, 4) array of column indices.
+    :param col_rows: the (indptr, indices) column to rows lookup from column_rows().
+    :param active_rows: a boolean vector representing which rows haven't and have been
+    removed.
     # this is used for efficiency's sake. Rather than creating a whole new matrix
-    # at each iteration when we remove row i, we simply set a active_rows[i] = 0.
+    # at each iteration when we remove row i, we simply set a active_rows[i] = False.
     :param active_cols: same as active_rows but for columns.
     :param solution: a list provided which will hold the final solution.
-    :return: True if the algorithm successfully found a solution.
+    :param solution_path: a list provided which will hold the execution path of the
+    algorithm, or None to not record it.
+    :param limit: the search stops once this many solutions are found. None searches
+    the whole tree.
+    :param stop: a callable checked every STOP_CHECK_INTERVAL nodes. The search gives
+    up as soon as it returns True.
+    :param stats: a stats.SolveStats to collect what the search does, or None.
+    :return: the number of solutions found, so with the default limit it is truthy if
+    the algorithm successfully found a solution. solution holds the last solution
+    found if the limit was reached.
     """
-    # no active columns means the solution is found.
-    if np.sum(active_cols) == 0:
-        return True
-    # pick the column with the lest number of 1s. This is a heuristic to speed up the
-    # algorithm (and is extremely effective for sudoku).
-    col, count = min_col(cover, active_rows, active_cols)
-    # a column that doesn't contains 1s means no solution can be found and we backtrack.
-    if count == 0:
-        print("backtrack!")
-        return False
-    for row in np.nonzero(active_rows * cover[:, col])[0]:
-        solution.append(row)
-        solution_path.append((1, row))  # 1 denotes selecting this row
-        # track removed rows and columns so we can easily add them back if we need
-        # to backtrack
-        removed_rows, removed_cols = select(row, cover, active_rows, active_cols)
-        solved = solve(cover, active_rows, active_cols, solution, solution_path)
-        if solved:
-            return True
-        # not solved: backtrack
-        solution.pop()
-        solution_path.append((0, row))  # 0 denotes deselecting this row
-        deselect(removed_rows, removed_cols, active_rows, active_cols)
+    indptr, indices = col_rows
+    n_cols = active_cols.shape[0]
+    found = 0
+    nodes = 0
+    trail = UndoTrail(active_rows.shape[0], n_cols)
+    trail.col_top = n_cols - int(np.count_nonzero(active_cols))
+    # the number of active rows in each column, kept up to date by select() and
+    # deselect() so choosing a column doesn't rescan the cover
+    counts = col_counts(cover, active_rows, n_cols)
+    counts[~active_cols] += REMOVED_COUNT
+    min_col_, select_, deselect_ = min_col, select, deselect
+    if stats is not None:
+        min_col_ = stats.profiled("min_col", min_col)
+        select_ = stats.profiled("select", select)
+        deselect_ = stats.profiled("deselect", deselect)
+    # one [candidate rows, next candidate, row mark, col mark, selected row] frame per
+    # level of the search
+    stack = []
+    while True:
+        # no active columns means the solution is found.
+        if trail.col_top == n_cols:
+            found += 1
+            if stats is not None:
+                stats.on_solution(len(stack))
+            if found == limit:
+                return found
+            # otherwise keep looking for the next one by backtracking
+        else:
+            # pick the column with the lest number of 1s. This is a heuristic to speed
+            # up the algorithm (and is extremely effective for sudoku).
+            col, count = min_col_(counts)
+            # a column that doesn't contains 1s means no solution can be found and we
+            # backtrack.
+            if count == 0:
+                if stats is not None:
+                    stats.on_dead_end(len(stack))
+            else:
+                # the rows of this column that are still active are the candidates for
+                # the final solution. They are filtered lazily since the active rows are
+                # restored to this very state before each candidate is tried.
+                candidate_rows = indices[indptr[col]:indptr[col + 1]]
+                stack.append([candidate_rows, 0, trail.row_top, trail.col_top, -1])
+                if stats is not None:
+                    stats.on_branch(len(stack) - 1, col, int(count))
+        # try the next candidate of the deepest level that has one left
+        while True:
+            if not stack:
+                return found
+            frame = stack[-1]
+            candidate_rows, position, row_mark, col_mark, selected = frame
+            if selected >= 0:
+                # not solved: backtrack
+                solution.pop()
+                if solution_path is not None:
+                    # 0 denotes deselecting this row
+                    solution_path.append((0, selected))
+                if stats is not None:
+                    stats.on_deselect(len(stack) - 1, selected)
+                deselect_(
+                    cover, trail, row_mark, col_mark, active_rows, active_cols, counts
+                )
+            n_candidates = candidate_rows.shape[0]
+            while position < n_candidates and not active_rows[candidate_rows[position]]:
+                position += 1
+            if position == n_candidates:
+                stack.pop()
+                continue
+            nodes += 1
+            if stop is not None and not nodes % STOP_CHECK_INTERVAL and stop():
+                return found
+            row = candidate_rows[position]
+            frame[1] = position + 1
+            frame[4] = row
+            solution.append(row)
+            if solution_path is not None:
+                solution_path.append((1, row))  # 1 denotes selecting this row
+            if stats is not None:
+                stats.on_select(len(stack) - 1, row)
+            select_(row, cover, col_rows, active_rows, active_cols, trail, counts)
+            break
 
 
-def select(row, cover, active_rows, active_cols):
+def select(row, cover, col_rows, active_rows, active_cols, trail, counts):
     """
     selects a row (possibility) by removing columns and rows that conflict with it.
     :param row: the row representing the selected possibility
-    :param cover: the cover matrix
-    :param active_rows: active rows in the cover matrix
-    :param active_cols: active columns in the cover matrix
-    :return: a tuple (removed_rows, removed_cols) which are numpy arrays containing a
-    1 if the row/column was removed or 0 otherwise.
+    :param cover: the cover
+    :param col_rows: the (indptr, indices) column to rows lookup
+    :param active_rows: active rows in the cover
+    :param active_cols: active columns in the cover
+    :param trail: the UndoTrail the removed rows and columns are pushed on, so they
+    can be restored with deselect()
+    :param counts: the live column counts, updated for the removed rows and columns
     """
-    removed_rows = np.zeros(active_rows.shape[0])
-    removed_cols = np.zeros(active_cols.shape[0])
-    columns_to_remove = np.nonzero(active_cols * cover[row, :])[0]
+    indptr, indices = col_rows
+    # an active row only has active columns, so all of them are removed
+    columns_to_remove = cover[row]
     # remove rows that have a 1 in a column that's being removed
-    for col in columns_to_remove:
-        rows_to_remove = np.nonzero(active_rows * cover[:, col])[0]
-        active_rows[rows_to_remove] = 0
-        removed_rows[rows_to_remove] = 1
+    rows_to_remove = np.concatenate(
+        [indices[indptr[col]:indptr[col + 1]] for col in columns_to_remove.tolist()]
+    )
+    rows_to_remove = np.unique(rows_to_remove[active_rows[rows_to_remove]])
+    active_rows[rows_to_remove] = False
+    np.subtract.at(counts, cover[rows_to_remove], 1)
+    top = trail.row_top + rows_to_remove.shape[0]
+    trail.rows[trail.row_top:top] = rows_to_remove
+    trail.row_top = top
     # now remove the column because `row` just covered it.
-    active_cols[columns_to_remove] = 0
-    removed_cols[columns_to_remove] = 1
-    return removed_rows, removed_cols
+    active_cols[columns_to_remove] = False
+    counts[columns_to_remove] += REMOVED_COUNT
+    top = trail.col_top + columns_to_remove.shape[0]
+    trail.cols[trail.col_top:top] = columns_to_remove
+    trail.col_top = top
 
 
-def deselect(removed_rows, removed_cols, active_rows, active_cols):
+def deselect(cover, trail, row_mark, col_mark, active_rows, active_cols, counts):
     """
-    restore rows and columns that were removed with select()
+    restore rows and columns that were removed with select() since the trail was at
+    (row_mark, col_mark)
     """
-    active_rows += removed_rows
-    active_cols += removed_cols
+    removed_rows = trail.rows[row_mark:trail.row_top]
+    removed_cols = trail.cols[col_mark:trail.col_top]
+    active_rows[removed_rows] = True
+    active_cols[removed_cols] = True
+    np.add.at(counts, cover[removed_rows], 1)
+    counts[removed_cols] -= REMOVED_COUNT
+    trail.row_top = row_mark
+    trail.col_top = col_mark
 
 
-def min_col(cover, active_rows, active_cols):
+def min_col(counts):
     """
+    :param counts: the live column counts, with REMOVED_COUNT added to removed columns
     :return: (column, count) tuple such that column contains the least number of 1s
     compared to other columns.
     """
-    active_col_indices = np.flatnonzero(active_cols)
-    counts = col_counts(cover, np.flatnonzero(active_rows))
-    argmin = active_col_indices[int(np.argmin(counts[active_col_indices]))]
+    argmin = int(np.argmin(counts))
     return argmin, counts[argmin]
 
 
-def col_counts(r, active_row_indices):
-    return np.sum(r[active_row_indices, :], axis=0)
+def col_counts(cover, active_rows, n_cols):
+    return np.bincount(cover[active_rows].ravel(), minlength=n_cols)
 
 def print_sudoku(s):
     for i in range(s.shape[0]):
@@ -172,42 +226,109 @@ def print_sudoku(s):
     print()
 
 
-def solve_sudoku(sudoku: np.array, grid_width=9, block_width=3):
+def solve_sudoku(sudoku: np.array, grid_width=9, block_width=3, engine="algx",
+                 path=None, stats=None):
+    """
+    Solves the sudoku with the chosen exact cover engine.
+    :param engine: "algx" for algorithm-x over the cover matrix, "dlx" for the
+    Dancing Links implementation in dlx.py, "bitboard" for the constraint
+    propagation solver in bitboard.py, or "para" for the array backend algorithm-x
+    in sudoku_para.py (on NumPy)
+    :param path: how to record the path the algorithm took. None doesn't record it,
+    "compact" returns it as a recording.CompactPath, and a callback is called with
+    each (operation_type, row, col, n) step as it is taken.
+    :param stats: a stats.SolveStats provided which will hold the counts (and timings,
+    if it profiles) of the search, or None. Only the algx and para engines profile,
+    and the bitboard engine only counts its branching, see bitboard.solve().
+    :return: a (completed_sudoku, solving_time, solution_path) tuple. completed_sudoku
+    is None if the sudoku has no solution. solution_path is the CompactPath if one
+    was asked for and the sudoku was solved, None otherwise.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine!r}")
+    if engine == "bitboard":
+        return bitboard.solve_sudoku(
+            sudoku,
+            grid_width=grid_width,
+            block_width=block_width,
+            path=path,
+            stats=stats,
+        )
+    if engine == "para":
+        return sudoku_para.solve_sudoku(
+            sudoku,
+            grid_width=grid_width,
+            block_width=block_width,
+            path=path,
+            stats=stats,
+        )
     cover, possibilities = create_cover(
         sudoku, grid_width=grid_width, block_width=block_width
     )
+    n_cols = 4 * grid_width * grid_width
     solution = []
-    solution_path = []
+    solution_path = path_recorder(path, possibilities)
     start = timer()
-    solved = solve(
-        cover,
-        np.ones(cover.shape[0]),
-        np.ones(cover.shape[1]),
-        solution,
-        solution_path
-    )
+    if engine == "dlx":
+        solved = dlx.solve(
+            dlx.build_links(cover, n_cols), solution, solution_path, stats=stats
+        )
+    else:
+        solved = solve(
+            cover,
+            column_rows(cover, n_cols),
+            np.ones(cover.shape[0], dtype=bool),
+            np.ones(n_cols, dtype=bool),
+            solution,
+            solution_path,
+            stats=stats,
+        )
     solving_time = timer() - start
     if solved:
         completed_sudoku = build_final_sudoku(possibilities, solution, sudoku)
-        sudoku_solution_path = build_solving_path(possibilities, solution_path)
-        return completed_sudoku, solving_time, sudoku_solution_path
+        if path != "compact":
+            solution_path = None
+        return completed_sudoku, solving_time, solution_path
     return None, solving_time, None
 
 
-def build_solving_path(possibilities, solution_path):
+def count_solutions(sudoku: np.array, grid_width=9, block_width=3, limit=None,
+                    engine="bitboard"):
     """
-    :return: an (operation_type, row, col, n) tuple list that represents the path
-    the algorithm took to solve the algorithm. "ins" means the algorithm inserted
-    number "n" into sudoku[row, col]
+    Counts the solutions of the sudoku, without recording the solving path or keeping
+    the solutions found.
+    :param limit: stop counting once this many solutions are found. limit=2 checks
+    that the sudoku has a unique solution. None counts them all.
+    :param engine: one of ENGINES, as for solve_sudoku()
+    :return: the number of solutions, at most `limit`
     """
-    sudoku_solution_path = []
-    for action, cover_row in solution_path:
-        row, col, n = possibilities[cover_row]
-        if action == 1:
-            sudoku_solution_path.append(("ins", row, col, n))
-        else:
-            sudoku_solution_path.append(("rem", row, col, n))
-    return sudoku_solution_path
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine!r}")
+    if engine == "para":
+        return sudoku_para.count_solutions(
+            sudoku, grid_width=grid_width, block_width=block_width, limit=limit
+        )
+    if engine == "bitboard":
+        return bitboard.solve(
+            [int(n) for n in sudoku.ravel()],
+            None,
+            grid_width=grid_width,
+            block_width=block_width,
+            limit=limit,
+        )
+    cover, _ = create_cover(sudoku, grid_width=grid_width, block_width=block_width)
+    n_cols = 4 * grid_width * grid_width
+    if engine == "dlx":
+        return dlx.solve(dlx.build_links(cover, n_cols), [], None, limit=limit)
+    return solve(
+        cover,
+        column_rows(cover, n_cols),
+        np.ones(cover.shape[0], dtype=bool),
+        np.ones(n_cols, dtype=bool),
+        [],
+        None,
+        limit=limit,
+    )
 
 
 def build_final_sudoku(possibilities, solution, sudoku):
@@ -215,14 +336,15 @@ def build_final_sudoku(possibilities, solution, sudoku):
     :return: the completed sudoku
     """
     final = np.zeros_like(sudoku)
-    for sol in solution:
-        row, col, n = possibilities[sol]
-        final[row, col] = n
+    chosen = possibilities[np.asarray(solution, dtype=np.intp)]
+    final[chosen["row"], chosen["col"]] = chosen["n"]
     return final
 
-def main():
-    if GUI_enabled == "1":
-        init_GUI()
+def main(gui=False):
+    """
+    Solves a sample sudoku and replays the solving path, in a pygame window if gui is
+    True and in the terminal otherwise. pygame is only imported for the window.
+    """
     _sudoku = np.array(
         [
             [0, 5, 0, 0, 7, 0, 0, 8, 3],
@@ -237,30 +359,32 @@ def main():
         ]
     )
     _completed_sudoku, _solving_time, _sudoku_solution_path = solve_sudoku(
-        _sudoku, grid_width=9, block_width=3
+        _sudoku, grid_width=9, block_width=3, path="compact"
     )
     if _completed_sudoku is None:
         print("No solution found :(")
+        return
+    if gui:
+        from GUI import Renderer
+
+        renderer = Renderer(_sudoku, block_width=3)
+        if renderer.replay(_sudoku_solution_path, steps_per_second=STEPS_PER_SECOND):
+            renderer.write_time('Solved in ' + str(_solving_time)[:7] + ' seconds')
+            renderer.wait(6)
+        renderer.close()
     else:
-        window = None
         for _action, _row, _col, _n in _sudoku_solution_path:
-            os.system("clear")
-            if _action == "ins":
-                _sudoku[_row, _col] = _n
-                window = print_gui(_sudoku) if GUI_enabled == "1" else print_sudoku(_sudoku)
-            else:
-                _sudoku[_row, _col] = 0
-                window = print_gui(_sudoku) if GUI_enabled == "1" else print_sudoku(_sudoku)
-            time.sleep(0.1)
-        # print_grid(_sudoku)
-    if GUI_enabled == "1": 
-        write_Time(window, str(_solving_time)[:7] + ' seconds')
-        time.sleep(6)
+            _sudoku[_row, _col] = _n if _action == "ins" else 0
+            print(CLEAR_SCREEN, end="")
+            print_sudoku(_sudoku)
+            time.sleep(1 / STEPS_PER_SECOND)
     print(f"solved in {_solving_time}")
 
 if __name__ == "__main__":
-    while True:
-        GUI_enabled = input('For GUI, type 1\nFor CLI, type 2\n')
-        if GUI_enabled in ["1","2"]: 
-            break
-    main()    
+    _parser = argparse.ArgumentParser(
+        description="Solves a sample sudoku. See cli.py to solve your own."
+    )
+    _parser.add_argument(
+        "--gui", action="store_true", help="replay the solving path in a window"
+    )
+    main(_parser.parse_args().gui)
@@ -1,169 +1,211 @@
+import argparse
 import os
 import time
 from timeit import default_timer as timer
 
-import cupy as cp
 import numpy as np
 
+from cover import column_rows, create_cover
+from recording import path_recorder
+
+# added to the count of a removed column, so min_col() never picks it
+REMOVED_COUNT = 1 << 40
+# the array libraries the solver can run on
+BACKENDS = ("numpy", "cupy")
 
-def create_cover(sudoku: np.array, grid_width=9, block_width=3):
-    """
-    Creates the relationship matrix used by algorithm-x
-    :param sudoku: the sudoku matrix (2-d numpy array)
-    :param grid_width: number of elements in a row
-    :param block_width: number of blocks in a row
-    :return: the relationship matrix (called a cover)
-    """
-    g_len = sudoku.shape[0]  # grid side length
-    n_non_zeros = int(np.count_nonzero(sudoku))
-    # N_possibilities = #_of_zeros * numbers_per_row + #_of_non_zeros
-    n_possibilities = (g_len * g_len - n_non_zeros) * g_len + n_non_zeros
-    # There are 4 types of constraints and each type has g_len * g_len constraints
-    n_constrains = 4 * g_len * g_len
-    # cover stores the 0-1 relationships that Algorithm-X uses
-    cover = np.zeros((n_possibilities, n_constrains), dtype=np.int8)
-    # possibilities stores the 'name' of a possibility (row, col, number) such that
-    # possibilities[i] is the name for row i in cover. This is used to fill in the
-    # sudoku at the end
-    possibilities = []
-    # iterate over each sudoku element, add possibilities and fill in its corresponding
-    # relationship with each constraint
-    for row in range(g_len):
-        for col in range(g_len):
-            # if (is a starting number in the sudoku grid)
-            if sudoku[row, col] != 0:
-                possibility = (row, col, int(sudoku[row, col]))
-                add_possibility(
-                    possibility,
-                    cover,
-                    len(possibilities),
-                    grid_width=grid_width,
-                    block_width=block_width,
-                )
-                possibilities.append(possibility)
-                continue
-            # (row,col) is an empty slot, so add all possibilities for this slot
-            for n in range(1, grid_width + 1):
-                possibility = (row, col, n)
-                add_possibility(
-                    possibility,
-                    cover,
-                    len(possibilities),
-                    grid_width=grid_width,
-                    block_width=block_width,
-                )
-                possibilities.append(possibility)
-    return cover, possibilities
 
+def array_module(backend="numpy"):
+    """
+    :param backend: "numpy" to solve on the CPU, or "cupy" to solve on a CUDA GPU.
+    CuPy is only imported when it is asked for, so the module works without it.
+    :return: the array module of the backend
+    """
+    if backend == "numpy":
+        return np
+    if backend == "cupy":
+        try:
+            import cupy
+        except ImportError as error:
+            raise ImportError("the cupy backend needs CuPy and a CUDA GPU") from error
+        return cupy
+    raise ValueError(f"unknown backend: {backend!r}")
 
-def add_possibility(possibility, cover, cover_row, grid_width=9, block_width=3):
+
+def to_host(xp, array):
     """
-    Adds the possibility and its constraint relationships to the cover matrix.
-    :param possibility: The possibility to add
-    :param cover: The cover matrix
-    :param cover_row: The row in the cover matrix to add the relationships
-    :param grid_width: number of elements in a row
-    :param block_width: number of blocks in a row
+    :return: the array in host memory, as a numpy array
     """
-    row, col, n = possibility
-    # Row-Column constraint
-    cover[cover_row, row * grid_width + col] = 1
-    # Row-Number constraint
-    cover[cover_row, grid_width * grid_width + row * grid_width + n - 1] = 1
-    # Col-Number constraint
-    cover[cover_row, 2 * grid_width * grid_width + col * grid_width + n - 1] = 1
-    # Block-Number constraint
-    # block_idx is the nth block, counting from left to right, top-down
-    block_idx = (row // block_width) * grid_width // block_width + (col // block_width)
-    cover[cover_row, 3 * grid_width * grid_width + block_idx * grid_width + n - 1] = 1
+    return array if xp is np else xp.asnumpy(array)
 
 
-def solve(cover_gpu, cover_cpu, active_rows, active_cols, solution, solution_path):
+def solve(
+    xp,
+    cover,
+    col_rows,
+    active_rows,
+    active_cols,
+    counts,
+    solution,
+    solution_path,
+    limit=1,
+    stats=None,
+):
     """
-    solves the exact cover problem with algorithm-x.
+    solves the exact cover problem with algorithm-x, keeping all of its state in
+    arrays of the backend xp so the work done at each node is a few array operations.
     See https://en.wikipedia.org/wiki/Knuth%27s_Algorithm_X for the high level algorithm
-    :param cover_gpu: the cover.
-    :param active_rows: a vector representing which rows haven't and have been removed.
-    # this is used for efficiency's sake. Rather than creating a whole new matrix
-    # at each iteration when we remove row i, we simply set a active_rows[i] = 0.
+    :param xp: the array module of the backend, see array_module()
+    :param cover: the cover, as an (n_rows, 4) array of column indices, on the backend.
+    :param col_rows: the (indptr, indices) column to rows lookup of column_rows(), with
+    indices on the backend.
+    :param active_rows: a boolean array on the backend such that active_rows[i] is
+    False once row i has been removed. It is updated in place and restored on
+    backtracking, so no new arrays of rows are built at each level.
     :param active_cols: same as active_rows but for columns.
+    :param counts: the number of active rows in each column, on the backend, with
+    REMOVED_COUNT added to removed columns. It is updated as rows and columns are
+    removed and restored, so choosing a column doesn't rescan the cover.
     :param solution: a list provided which will hold the final solution.
     :param solution_path: a list provided which will hold the execution path of the
-    algorithm.
-    :return: True if the algorithm successfully found a solution.
-    """
-    # no active columns means the solution is found.
-    if len(active_cols) == 0:
-        return True
-    # pick the column with the lest number of 1s. This is a heuristic to speed up the
-    # algorithm (and is extremely effective for sudoku).
-    col, count = min_col(cover_gpu, active_rows, active_cols)
-    # a column that doesn't contains 1s means no solution can be found and we backtrack.
-    if count == 0:
-        return False
-    # get all row indices that are active and have a 1 in this column. These rows are
-    # candidates for the final solution.
-    candidate_rows = np.array(active_rows)[np.flatnonzero(cover_cpu[active_rows, col])]
-    for row in candidate_rows:
-        solution.append(row)
-        solution_path.append((1, row))  # 1 denotes select this row
-        # track removed rows and columns so we can easily add them back if we need
-        # to backtrack
-        rows_to_remove, cols_to_remove = select(
-            row, cover_cpu, active_rows, active_cols
-        )
-        active_rows = np.setdiff1d(np.array(active_rows), rows_to_remove).tolist()
-        active_cols = np.setdiff1d(np.array(active_cols), cols_to_remove).tolist()
-        solved = solve(
-            cover_gpu, cover_cpu, active_rows, active_cols, solution, solution_path
-        )
-        if solved:
-            return True
-        # not solved: backtrack
-        solution.pop()
-        solution_path.append((0, row))  # 1 denotes deselecting this row
-        deselect(rows_to_remove, cols_to_remove, active_rows, active_cols)
-
-
-def select(row, cover, active_rows, active_cols):
+    algorithm, or None to not record it.
+    :param limit: the search stops once this many solutions are found. None searches
+    the whole tree.
+    :param stats: a stats.SolveStats to collect what the search does, or None.
+    :return: the number of solutions found, so with the default limit it is truthy if
+    the algorithm successfully found a solution. solution holds the last solution
+    found if the limit was reached.
+    """
+    indptr, indices = col_rows
+    min_col_, select_, deselect_ = min_col, select, deselect
+    if stats is not None:
+        min_col_ = stats.profiled("min_col", min_col)
+        select_ = stats.profiled("select", select)
+        deselect_ = stats.profiled("deselect", deselect)
+    # the column slices are taken on the host, a handful per node
+    indptr = to_host(xp, indptr).tolist()
+    cover_host = to_host(xp, cover)
+    n_active_cols = int(active_cols.sum())
+    found = 0
+    # one [candidate rows, next candidate, removed rows, removed cols] frame per level
+    # of the search
+    stack = []
+    while True:
+        # no active columns means the solution is found.
+        if n_active_cols == 0:
+            found += 1
+            if stats is not None:
+                stats.on_solution(len(stack))
+            if found == limit:
+                return found
+            # otherwise keep looking for the next one by backtracking
+        else:
+            # pick the column with the lest number of 1s. This is a heuristic to speed
+            # up the algorithm (and is extremely effective for sudoku).
+            col, count = min_col_(xp, counts)
+            # a column that doesn't contains 1s means no solution can be found and we
+            # backtrack, otherwise its active rows are the candidates for the final
+            # solution.
+            if count > 0:
+                candidate_rows = indices[indptr[col]:indptr[col + 1]]
+                candidate_rows = candidate_rows[active_rows[candidate_rows]].tolist()
+                stack.append([candidate_rows, 0, None, None])
+                if stats is not None:
+                    stats.on_branch(len(stack) - 1, col, count)
+            elif stats is not None:
+                stats.on_dead_end(len(stack))
+        # try the next candidate of the deepest level that has one left
+        while True:
+            if not stack:
+                return found
+            frame = stack[-1]
+            candidate_rows, position, removed_rows, removed_cols = frame
+            if removed_rows is not None:
+                # not solved: backtrack
+                solution.pop()
+                if solution_path is not None:
+                    # 0 denotes deselecting this row
+                    solution_path.append((0, candidate_rows[position - 1]))
+                if stats is not None:
+                    stats.on_deselect(len(stack) - 1, candidate_rows[position - 1])
+                deselect_(
+                    xp, cover, removed_rows, removed_cols, active_rows, active_cols,
+                    counts
+                )
+                n_active_cols += removed_cols.shape[0]
+                frame[2] = frame[3] = None
+            if position == len(candidate_rows):
+                stack.pop()
+                continue
+            row = candidate_rows[position]
+            frame[1] = position + 1
+            solution.append(row)
+            if solution_path is not None:
+                solution_path.append((1, row))  # 1 denotes selecting this row
+            if stats is not None:
+                stats.on_select(len(stack) - 1, row)
+            # keep the removed rows and columns so we can easily add them back if we
+            # need to backtrack
+            frame[2], frame[3] = select_(
+                xp, row, cover, cover_host, indptr, indices, active_rows, active_cols,
+                counts
+            )
+            n_active_cols -= frame[3].shape[0]
+            break
+
+
+def select(
+    xp, row, cover, cover_host, indptr, indices, active_rows, active_cols, counts
+):
     """
     selects a row (possibility) by removing columns and rows that conflict with it.
     :param row: the row representing the selected possibility
-    :param cover: the cover matrix
-    :param active_rows: active rows in the cover matrix
-    :param active_cols: active columns in the cover matrix
-    :return: a tuple (removed_rows, removed_cols) which are numpy arrays containing a
-    1 if the row/column was removed or 0 otherwise.
-    """
-    active_rows = np.array(active_rows)
-    active_cols = np.array(active_cols)
-    columns_to_remove = active_cols[np.nonzero(cover[row, active_cols])[0]]
-    rows_to_remove = active_rows[
-        np.unique(np.nonzero(cover[np.ix_(active_rows, columns_to_remove)])[0])
-    ]
+    :param cover: the cover, on the backend
+    :param cover_host: the same cover in host memory
+    :param indptr: the column to rows offsets, as a list
+    :param indices: the column to rows indices, on the backend
+    :param active_rows: active rows in the cover
+    :param active_cols: active columns in the cover
+    :param counts: the live column counts, updated for the removed rows and columns
+    :return: a tuple (removed_rows, removed_cols) of backend arrays holding the
+    indices of the rows/columns that were removed.
+    """
+    # an active row only has active columns, so all of them are removed
+    columns = cover_host[row].tolist()
+    columns_to_remove = cover[row]
+    # remove rows that have a 1 in a column that's being removed
+    rows_to_remove = xp.concatenate(
+        [indices[indptr[col]:indptr[col + 1]] for col in columns]
+    )
+    rows_to_remove = xp.unique(rows_to_remove[active_rows[rows_to_remove]])
+    active_rows[rows_to_remove] = False
+    counts -= xp.bincount(cover[rows_to_remove].ravel(), minlength=counts.shape[0])
+    # now remove the columns because `row` just covered them.
+    active_cols[columns_to_remove] = False
+    counts[columns_to_remove] += REMOVED_COUNT
     return rows_to_remove, columns_to_remove
 
 
-def deselect(removed_rows, removed_cols, active_rows, active_cols):
+def deselect(xp, cover, removed_rows, removed_cols, active_rows, active_cols, counts):
     """
     restore rows and columns that were removed with select()
     """
-    active_rows += removed_rows.tolist()
-    active_cols += removed_cols.tolist()
+    active_rows[removed_rows] = True
+    active_cols[removed_cols] = True
+    counts += xp.bincount(cover[removed_rows].ravel(), minlength=counts.shape[0])
+    counts[removed_cols] -= REMOVED_COUNT
 
 
-def min_col(cover, active_rows, active_cols):
+def min_col(xp, counts):
     """
     :return: (column, count) tuple such that column contains the least number of 1s
     compared to other columns.
     """
-    counts = col_counts(cover, active_rows)
-    argmin = active_cols[int(cp.argmin(counts[active_cols]))]
-    return argmin, counts[argmin]
+    argmin = int(xp.argmin(counts))
+    return argmin, int(counts[argmin])
 
 
-def col_counts(cover, active_rows):
-    return cp.sum(cover[active_rows, :], axis=0)
+def col_counts(xp, cover, active_rows, n_cols):
+    return xp.bincount(cover[active_rows].ravel(), minlength=n_cols).astype(xp.int64)
 
 
 def print_sudoku(s):
@@ -180,43 +222,76 @@ def print_sudoku(s):
     print()
 
 
-def solve_sudoku(sudoku: np.array, grid_width=9, block_width=3):
+def solve_cover(xp, cover, n_cols, solution, solution_path, limit=1, stats=None):
+    """
+    Moves the cover to the backend and runs solve() on it with every row and column
+    active.
+    :return: the number of solutions found, as for solve()
+    """
+    indptr, indices = column_rows(cover, n_cols)
+    cover = xp.asarray(cover)
+    active_rows = xp.ones(cover.shape[0], dtype=bool)
+    active_cols = xp.ones(n_cols, dtype=bool)
+    return solve(
+        xp,
+        cover,
+        (indptr, xp.asarray(indices)),
+        active_rows,
+        active_cols,
+        col_counts(xp, cover, active_rows, n_cols),
+        solution,
+        solution_path,
+        limit=limit,
+        stats=stats,
+    )
+
+
+def solve_sudoku(
+    sudoku: np.array,
+    grid_width=9,
+    block_width=3,
+    path=None,
+    backend="numpy",
+    stats=None,
+):
+    """
+    :param path: how to record the path the algorithm took, as for
+    sudoku.solve_sudoku()
+    :param backend: the array library to solve with, "numpy" or "cupy"
+    :param stats: a stats.SolveStats provided which will hold the counts of the
+    search, or None
+    :return: a (completed_sudoku, solving_time, solution_path) tuple
+    """
+    xp = array_module(backend)
     cover, possibilities = create_cover(
         sudoku, grid_width=grid_width, block_width=block_width
     )
     solution = []
-    solution_path = []
+    solution_path = path_recorder(path, possibilities)
     start = timer()
-    solved = solve(
-        cp.asarray(cover),
-        cover,
-        list(range(cover.shape[0])),
-        list(range(cover.shape[1])),
-        solution,
-        solution_path,
+    solved = solve_cover(
+        xp, cover, 4 * grid_width * grid_width, solution, solution_path, stats=stats
     )
     solving_time = timer() - start
     if solved:
         completed_sudoku = build_final_sudoku(possibilities, solution, sudoku)
-        sudoku_solution_path = build_solving_path(possibilities, solution_path)
-        return completed_sudoku, solving_time, sudoku_solution_path
+        if path != "compact":
+            solution_path = None
+        return completed_sudoku, solving_time, solution_path
     return None, solving_time, None
 
 
-def build_solving_path(possibilities, solution_path):
+def count_solutions(
+    sudoku: np.array, grid_width=9, block_width=3, limit=None, backend="numpy"
+):
     """
-    :return: an (operation_type, row, col, n) tuple list that represents the path
-    the algorithm took to solve the algorithm. "ins" means the algorithm inserted
-    number "n" into sudoku[row, col]
+    Counts the solutions of the sudoku, as sudoku.count_solutions() does.
+    :param backend: the array library to solve with, "numpy" or "cupy"
+    :return: the number of solutions, at most `limit`
     """
-    sudoku_solution_path = []
-    for action, cover_row in solution_path:
-        row, col, n = possibilities[cover_row]
-        if action == 1:
-            sudoku_solution_path.append(("ins", row, col, n))
-        else:
-            sudoku_solution_path.append(("rem", row, col, n))
-    return sudoku_solution_path
+    xp = array_module(backend)
+    cover, _ = create_cover(sudoku, grid_width=grid_width, block_width=block_width)
+    return solve_cover(xp, cover, 4 * grid_width * grid_width, [], None, limit=limit)
 
 
 def build_final_sudoku(possibilities, solution, sudoku):
@@ -224,16 +299,18 @@ def build_final_sudoku(possibilities, solution, sudoku):
     :return: the completed sudoku
     """
     final = np.zeros_like(sudoku)
-    for sol in solution:
-        row, col, n = possibilities[sol]
-        final[row, col] = n
+    chosen = possibilities[np.asarray(solution, dtype=np.intp)]
+    final[chosen["row"], chosen["col"]] = chosen["n"]
     return final
 
 
 if __name__ == "__main__":
-    _sudoku = np.zeros((25, 25), dtype=cp.uint8)
+    _parser = argparse.ArgumentParser()
+    _parser.add_argument("--backend", choices=BACKENDS, default="numpy")
+    _args = _parser.parse_args()
+    _sudoku = np.zeros((25, 25), dtype=np.uint8)
     _completed_sudoku, _solving_time, _sudoku_solution_path = solve_sudoku(
-        _sudoku, grid_width=25, block_width=5
+        _sudoku, grid_width=25, block_width=5, backend=_args.backend
     )
     if _completed_sudoku is None:
         print("No solution found :(")
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.bitboard import HARD_17
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_closed_pipe_exits_without_a_traceback(tmp_path):
+    puzzles = tmp_path / "puzzles.txt"
+    puzzles.write_text("\n".join(HARD_17 * 500) + "\n")
+    process = subprocess.Popen(
+        [sys.executable, "batch.py", str(puzzles)],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    # read one solution and hang up, as head does
+    assert len(process.stdout.readline().strip()) == 81
+    process.stdout.close()
+    stderr = process.stderr.read().decode()
+    assert process.wait(timeout=60) == 1
+    assert "Traceback" not in stderr
+
+
+def test_unordered_solutions_go_to_the_output_file(tmp_path):
+    puzzles = tmp_path / "puzzles.txt"
+    puzzles.write_text("\n".join(HARD_17) + "\n")
+    output = tmp_path / "solutions.txt"
+    subprocess.run(
+        [sys.executable, "batch.py", str(puzzles), "--unordered", "-o", str(output)],
+        cwd=ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    lines = output.read_text().splitlines()
+    assert sorted(int(line.split("\t")[0]) for line in lines) == list(
+        range(len(HARD_17))
+    )
@@ -0,0 +1,12 @@
+import numpy as np
+import pytest
+
+from canonical import canonical_form
+
+
+@pytest.mark.parametrize("value", [-1, 10, 255])
+def test_out_of_range_numbers_are_rejected(value):
+    sudoku = np.zeros((9, 9), dtype=np.int64)
+    sudoku[4, 4] = value
+    with pytest.raises(ValueError, match="between 0 and 9"):
+        canonical_form(sudoku)
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.bitboard import HARD_17
+from puzzle_io import read_puzzles
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_closed_pipe_exits_without_a_traceback(tmp_path):
+    puzzles = tmp_path / "puzzles.txt"
+    puzzles.write_text("\n".join(HARD_17 * 500) + "\n")
+    process = subprocess.Popen(
+        [sys.executable, "cli.py", "-f", str(puzzles)],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    # read one solution and hang up, as head does
+    assert len(process.stdout.readline().strip()) == 81
+    process.stdout.close()
+    stderr = process.stderr.read().decode()
+    assert process.wait(timeout=60) == 1
+    assert "Traceback" not in stderr
+
+
+def test_4x4_solutions_read_back(tmp_path):
+    puzzles = tmp_path / "puzzles.txt"
+    puzzles.write_text("1 . . .\n. . 3 .\n. 4 . .\n. . . 2\n\n")
+    output = tmp_path / "solutions.txt"
+    subprocess.run(
+        [sys.executable, "cli.py", "-f", str(puzzles), "-o", str(output)],
+        cwd=ROOT,
+        check=True,
+    )
+    [solution] = read_puzzles(output.read_text().splitlines())
+    assert solution.shape == (4, 4)
+    assert solution[0, 0] == 1 and solution[3, 3] == 2
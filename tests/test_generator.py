@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from generator import format_rated, generate, is_unique
+from puzzle_io import read_puzzles
+
+
+@pytest.mark.parametrize("grid_width, block_width", [(4, 2), (9, 3)])
+def test_output_reads_back(grid_width, block_width):
+    puzzles = [generate(seed, grid_width, block_width) for seed in range(3)]
+    text = "".join(format_rated(puzzle, rating) for puzzle, _, rating in puzzles)
+    read = list(read_puzzles(text.splitlines()))
+    assert len(read) == len(puzzles)
+    for sudoku, (puzzle, solution, _) in zip(read, puzzles):
+        assert np.array_equal(sudoku, puzzle)
+        assert is_unique(puzzle, block_width)
+        assert np.array_equal(solution[puzzle != 0], puzzle[puzzle != 0])
+
+
+def test_9x9_puzzles_are_minimal():
+    for seed in range(3):
+        puzzle, _, _ = generate(seed)
+        for row, col in np.argwhere(puzzle).tolist():
+            fewer = puzzle.copy()
+            fewer[row, col] = 0
+            assert not is_unique(fewer)
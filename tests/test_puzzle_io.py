@@ -0,0 +1,17 @@
+import pytest
+
+from puzzle_io import read_puzzles
+
+
+@pytest.mark.parametrize(
+    "lines, layout, message",
+    [
+        (["# comment", "1 " * 80 + "10"], "line", "line 2: 10 is not a number"),
+        (["1 2 3 4 " * 3 + "1 2 3 5"], "line", "line 1: 5 is not a number"),
+        (["1 2 . .", ". . -1 .", ". . . .", ". . . ."], "grid", "line 2: -1"),
+        (["1200", "0090", "0000", "0000"], "auto", "line 2: 9 is not a number"),
+    ],
+)
+def test_out_of_range_cells_are_rejected(lines, layout, message):
+    with pytest.raises(ValueError, match=message):
+        list(read_puzzles(lines, layout))
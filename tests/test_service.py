@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.bitboard import HARD_17
+from benchmarks.corpora import generated
+from benchmarks.loadtest import post
+import bitboard
+from service import DEFERRED, SolverService, _solve_batch, parse_puzzle
+
+EASY = "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+
+
+async def _with_service(client, **kwargs):
+    """
+    runs client(port) against a service with one worker on a free port
+    """
+    service = SolverService(workers=1, **kwargs)
+    service.start()
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await client(port)
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+
+def test_malformed_puzzle_does_not_fail_its_batch():
+    bad = "-1 " + " ".join(["0"] * 80)
+
+    async def client(port):
+        return await asyncio.gather(
+            post("127.0.0.1", port, "/solve", {"puzzle": bad}),
+            post("127.0.0.1", port, "/solve", {"puzzle": EASY}),
+        )
+
+    (bad_status, bad_body), (status, body) = asyncio.run(
+        _with_service(client, batch_window=0.2)
+    )
+    assert bad_status == 400 and "-1 is not a number" in bad_body["error"]
+    assert status == 200 and body["status"] == "solved"
+
+
+def test_worker_error_only_fails_its_own_job():
+    deadline = time.monotonic() + 5
+    bad = np.full((9, 9), -1)
+    results = _solve_batch(
+        [(bad, deadline, 10_000), (parse_puzzle(EASY), deadline, 10_000)], "bitboard"
+    )
+    assert isinstance(results[0], Exception)
+    assert results[1][0] == "solved"
+
+
+@pytest.mark.parametrize("puzzle", [5, [[[1]]], [[1, 2, 3], [4, 5, 6]], "-1" * 81])
+def test_parse_puzzle_rejects_non_sudokus(puzzle):
+    with pytest.raises(ValueError):
+        parse_puzzle(puzzle)
+
+
+def test_non_2d_puzzle_is_a_bad_request():
+    async def client(port):
+        return await post("127.0.0.1", port, "/solve", {"puzzle": 5})
+
+    status, body = asyncio.run(_with_service(client))
+    assert status == 400 and "error" in body
+
+
+def test_hard_puzzle_does_not_hold_up_its_batch():
+    hard = generated(25, 5, 0.45, 0).ravel().tolist()
+
+    async def client(port):
+        async def timed(puzzle):
+            start = time.monotonic()
+            result = await post("127.0.0.1", port, "/solve", {"puzzle": puzzle})
+            return result, time.monotonic() - start
+
+        return await asyncio.gather(
+            timed(hard), timed(HARD_17[0]), timed(HARD_17[1])
+        )
+
+    results = asyncio.run(_with_service(client, timeout=3, batch_window=0.2))
+    ((_, hard_body), _), *easy = results
+    assert hard_body["status"] == "timeout"
+    for (status, body), latency in easy:
+        assert body["status"] == "solved"
+        assert latency < 1
+
+
+def test_empty_puzzle_list_gets_no_results():
+    async def client(port):
+        return await post("127.0.0.1", port, "/solve", {"puzzles": []})
+
+    assert asyncio.run(_with_service(client)) == (200, {"results": []})
+
+
+def test_deferred_job_reports_the_nodes_it_spent():
+    hard = generated(25, 5, 0.45, 0)
+    deadline = time.monotonic() + 5
+    [result] = _solve_batch([(hard, deadline, 10_000)], "bitboard", batch_slice=0)
+    assert result == (DEFERRED, bitboard.STOP_CHECK_INTERVAL)
+
+
+def test_deferred_puzzles_wait_for_a_slot():
+    hard = generated(25, 5, 0.45, 0)
+
+    async def run():
+        service = SolverService(workers=1, batch_slice=0, node_budget=2000)
+        in_flight = most_in_flight = 0
+        submit = service._submit
+
+        async def counted_submit(*args):
+            nonlocal in_flight, most_in_flight
+            in_flight += 1
+            most_in_flight = max(most_in_flight, in_flight)
+            try:
+                return await submit(*args)
+            finally:
+                in_flight -= 1
+
+        service._submit = counted_submit
+        service.start()
+        try:
+            results = await service.solve([hard] * 3)
+        finally:
+            await service.close()
+        return results, most_in_flight
+
+    results, most_in_flight = asyncio.run(run())
+    assert most_in_flight == 1
+    assert [status for status, _ in results] == ["node_budget"] * 3
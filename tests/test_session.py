@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from benchmarks.corpora import corpora
+from session import SolverSession
+from sudoku import solve_sudoku
+
+
+def peer_candidates(grid, row, col, block_width):
+    """
+    :return: the numbers no peer of the cell holds, checked by brute force
+    """
+    if grid[row, col]:
+        return [int(grid[row, col])]
+    top, left = row - row % block_width, col - col % block_width
+    peers = set(grid[row].tolist()) | set(grid[:, col].tolist())
+    peers |= set(grid[top:top + block_width, left:left + block_width].ravel().tolist())
+    return [n for n in range(1, grid.shape[0] + 1) if n not in peers]
+
+
+def empty_session():
+    return SolverSession(np.zeros((9, 9), dtype=np.int64))
+
+
+def test_conflicting_number_is_kept_aside():
+    session = empty_session()
+    assert session.place(0, 0, 1)
+    assert not session.place(0, 8, 1)
+    assert not session.is_consistent()
+    assert session.hint() is None
+    # column 8 holds the conflicting 1, and row 0 both of them
+    assert 1 not in session.candidates(5, 8)
+    assert 1 not in session.candidates(0, 4)
+    assert session.candidates(5, 5) == list(range(1, 10))
+    assert session.unplace(0, 0) == 1
+    assert session.is_consistent()
+    assert session.candidates(5, 8) == list(range(2, 10))
+
+
+def test_givens_cannot_be_removed_or_out_of_range():
+    grid_width, block_width, sudokus = corpora()["easy-9"]
+    sudoku = sudokus[0]
+    session = SolverSession(sudoku, grid_width, block_width)
+    row, col = np.argwhere(sudoku)[0].tolist()
+    with pytest.raises(ValueError):
+        session.unplace(row, col)
+    row, col = np.argwhere(sudoku == 0)[0].tolist()
+    with pytest.raises(ValueError):
+        session.place(row, col, 10)
+
+
+def test_hints_fill_in_the_solution():
+    grid_width, block_width, sudokus = corpora()["hard-9"]
+    sudoku = sudokus[0]
+    solution, _, _ = solve_sudoku(sudoku, grid_width, block_width)
+    session = SolverSession(sudoku, grid_width, block_width)
+    for _ in range(np.count_nonzero(sudoku == 0)):
+        row, col, n = session.hint()
+        assert solution[row, col] == n
+        assert n in session.candidates(row, col)
+        assert session.place(row, col, n)
+    assert session.hint() is None
+    assert np.array_equal(session.grid, solution)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    grid_width, block_width, sudokus = corpora()["hard-9"]
+    sudoku = sudokus[seed % len(sudokus)]
+    session = SolverSession(sudoku, grid_width, block_width)
+    empty = np.argwhere(sudoku == 0).tolist()
+    for _ in range(200):
+        row, col = empty[rng.integers(len(empty))]
+        if session.grid[row, col] and rng.random() < 0.4:
+            session.unplace(row, col)
+        else:
+            session.place(row, col, int(rng.integers(1, grid_width + 1)))
+        for r, c in empty:
+            assert session.candidates(r, c) == peer_candidates(
+                session.grid, r, c, block_width
+            )
+        solvable = solve_sudoku(session.grid, grid_width, block_width)[0] is not None
+        assert session.is_consistent() == solvable
+        hint = session.hint()
+        assert (hint is not None) == (solvable and (session.grid == 0).any())
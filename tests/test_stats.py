@@ -0,0 +1,18 @@
+import pytest
+
+import sudoku_para
+from benchmarks.corpora import corpora
+from stats import SolveStats
+from sudoku import solve_sudoku
+
+
+@pytest.mark.parametrize("engine", ["algx", "dlx", "bitboard", "para"])
+def test_rows_selected_at_the_root_are_at_depth_0(engine):
+    grid_width, block_width, sudokus = corpora()["hard-9"]
+    stats = SolveStats()
+    if engine == "para":
+        sudoku_para.solve_sudoku(sudokus[0], grid_width, block_width, stats=stats)
+    else:
+        solve_sudoku(sudokus[0], grid_width, block_width, engine=engine, stats=stats)
+    assert stats.depth_histogram[0] > 0
+    assert sum(stats.depth_histogram) == stats.nodes
@@ -0,0 +1,203 @@
+"""
+Checks completed sudokus in bulk: every cell holds a number from 1 to N, every row,
+column and block holds each of them once, and the givens of the puzzle are kept.
+Usage: python validate.py SOLUTIONS [--givens PUZZLES]
+
+Prints the index and first violation of every invalid solution, and exits with
+status 1 if there is any. Both files can be text or binary, see puzzle_io.py.
+"""
+import argparse
+import math
+import sys
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+from puzzle_io import is_binary, map_binary, read_file, unpack
+
+# the kinds of violation validate() reports, in the order they are looked for. A cell
+# that is empty or holds a number outside 1..N is a NUMBER violation.
+VALID = 0
+NUMBER = 1
+GIVEN = 2
+ROW = 3
+COLUMN = 4
+BLOCK = 5
+KINDS = ("valid", "number", "given", "row", "column", "block")
+# number of sudokus checked at a time. Small chunks keep the temporary arrays in the
+# CPU cache, which is faster than checking a whole batch at once.
+CHUNK_SIZE = 4096
+
+
+def validate(solutions: np.array, givens=None, block_width=3, chunksize=CHUNK_SIZE):
+    """
+    Checks a batch of completed sudokus. A unit is valid if the OR of the bits
+    1 << (n - 1) of its numbers has all N bits set, so each check is a handful of
+    NumPy operations over the whole chunk; the first violation is only looked for in
+    the sudokus that fail.
+    :param solutions: a (B, N, N) array of completed sudokus, such as a memmap of a
+    binary puzzle file. It is read a chunk at a time.
+    :param givens: the (B, N, N) puzzles the solutions are for, or None to not check
+    them
+    :return: a (valid, kinds, indices) tuple of (B,) arrays. valid[b] tells if
+    solution b is valid. kinds[b] is the kind of its first violation (VALID if there
+    is none) and indices[b] the cell (NUMBER, GIVEN) or unit (ROW, COLUMN, BLOCK) it
+    is in, -1 if there is none. Cells count row by row and blocks left to right,
+    top-down.
+    """
+    n_solutions = solutions.shape[0]
+    valid = np.empty(n_solutions, dtype=bool)
+    kinds = np.zeros(n_solutions, dtype=np.uint8)
+    indices = np.full(n_solutions, -1, dtype=np.int32)
+    for start in range(0, n_solutions, chunksize):
+        end = min(start + chunksize, n_solutions)
+        chunk_givens = None if givens is None else np.asarray(givens[start:end])
+        valid[start:end], kinds[start:end], indices[start:end] = _validate_chunk(
+            np.asarray(solutions[start:end]), chunk_givens, block_width
+        )
+    return valid, kinds, indices
+
+
+def _validate_chunk(solutions, givens, block_width):
+    n, grid_width, _ = solutions.shape
+    bits = _bits(solutions)
+    # OR the cells of every row, column and block together, one cell position at a
+    # time
+    rows = bits[:, :, 0].copy()
+    for i in range(1, grid_width):
+        rows |= bits[:, :, i]
+    cols = bits[:, 0].copy()
+    for i in range(1, grid_width):
+        cols |= bits[:, i]
+    n_blocks = grid_width // block_width
+    cells = bits.reshape(n, n_blocks, block_width, n_blocks, block_width)
+    blocks = cells[:, :, 0, :, 0].copy()
+    for i in range(block_width):
+        for j in range(block_width):
+            blocks |= cells[:, :, i, :, j]
+    blocks = blocks.reshape(n, grid_width)
+    # the numbers outside 1..N have no bit, so they make their units fail too
+    full = bits.dtype.type((1 << grid_width) - 1)
+    units = rows & cols
+    units &= blocks
+    valid = (units == full).all(axis=1)
+    if givens is not None:
+        wrong_givens = (givens != 0) & (givens != solutions)
+        valid &= ~wrong_givens.reshape(n, -1).any(axis=1)
+    kinds = np.zeros(n, dtype=np.uint8)
+    indices = np.full(n, -1, dtype=np.int32)
+    invalid = np.flatnonzero(~valid)
+    if invalid.shape[0]:
+        n_cells = grid_width * grid_width
+        no_givens = np.zeros((invalid.shape[0], n_cells), dtype=bool)
+        # every cell and unit that could be violated, in the order of KINDS
+        violations = np.concatenate(
+            [
+                bits[invalid].reshape(-1, n_cells) == 0,
+                no_givens if givens is None
+                else wrong_givens[invalid].reshape(-1, n_cells),
+                rows[invalid] != full,
+                cols[invalid] != full,
+                blocks[invalid] != full,
+            ],
+            axis=1,
+        )
+        first = violations.argmax(axis=1)
+        is_cell = first < 2 * n_cells
+        kinds[invalid] = np.where(
+            is_cell,
+            NUMBER + first // n_cells,
+            ROW + (first - 2 * n_cells) // grid_width,
+        )
+        indices[invalid] = np.where(
+            is_cell, first % n_cells, (first - 2 * n_cells) % grid_width
+        )
+    return valid, kinds, indices
+
+
+def _bits(sudokus):
+    """
+    :return: the bit 1 << (n - 1) of each number n, 0 for the numbers outside 1..N,
+    in the narrowest unsigned dtype that holds N bits
+    """
+    grid_width = sudokus.shape[1]
+    if sudokus.dtype != np.uint8:
+        # anything outside 0..255 is outside 1..N too
+        sudokus = np.clip(sudokus, 0, 255).astype(np.uint8)
+    return np.take(_bit_table(grid_width), sudokus)
+
+
+@lru_cache(maxsize=None)
+def _bit_table(grid_width):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if grid_width <= np.iinfo(dtype).bits:
+            break
+    else:
+        raise ValueError(f"can't validate {grid_width}x{grid_width} sudokus")
+    table = np.zeros(256, dtype=dtype)
+    table[1:grid_width + 1] = np.left_shift(1, np.arange(grid_width, dtype=dtype))
+    return table
+
+
+def describe(kind, index, grid_width=9):
+    """
+    :return: a sentence describing the violation of a (kind, index) pair returned by
+    validate()
+    """
+    if kind == VALID:
+        return "valid"
+    if kind in (NUMBER, GIVEN):
+        row, col = divmod(int(index), grid_width)
+        if kind == NUMBER:
+            return f"cell ({row}, {col}) isn't a number from 1 to {grid_width}"
+        return f"cell ({row}, {col}) doesn't keep its given"
+    return f"{KINDS[kind]} {index} doesn't hold every number once"
+
+
+def read_chunks(path, chunksize=CHUNK_SIZE):
+    """
+    :return: a generator of (n, N, N) arrays of the sudokus of a text or binary file,
+    at most chunksize at a time. Binary files are memory-mapped.
+    """
+    if path != "-" and is_binary(path):
+        grid_width, encoding, records = map_binary(path)
+        for start in range(0, records.shape[0], chunksize):
+            yield unpack(records[start:start + chunksize], grid_width, encoding)
+        return
+    sudokus = read_file(path)
+    while True:
+        chunk = list(islice(sudokus, chunksize))
+        if not chunk:
+            return
+        yield np.stack(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("solutions", help="'-' for text on stdin")
+    parser.add_argument("--givens", default=None, help="the puzzles, in order")
+    args = parser.parse_args()
+    givens = None if args.givens is None else read_chunks(args.givens)
+    n_solutions = n_invalid = 0
+    for chunk in read_chunks(args.solutions):
+        grid_width = chunk.shape[1]
+        block_width = math.isqrt(grid_width)
+        chunk_givens = None if givens is None else next(givens, None)
+        if givens is not None and (
+            chunk_givens is None or chunk_givens.shape != chunk.shape
+        ):
+            parser.error("the givens don't match the solutions")
+        _, kinds, indices = validate(chunk, chunk_givens, block_width)
+        for b in np.flatnonzero(kinds != VALID).tolist():
+            print(f"{n_solutions + b}: {describe(kinds[b], indices[b], grid_width)}")
+        n_invalid += np.count_nonzero(kinds != VALID)
+        n_solutions += chunk.shape[0]
+    print(f"{n_solutions - n_invalid} of {n_solutions} valid", file=sys.stderr)
+    sys.exit(1 if n_invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
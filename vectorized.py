@@ -0,0 +1,131 @@
+"""
+Solves many sudokus of the same size at once. The candidates of a whole batch live in
+one array and singles are propagated across all of them with a few NumPy operations
+per pass, so the per-puzzle Python overhead of solving them one by one disappears.
+Puzzles that singles can't finish fall back to bitboard.solve().
+"""
+from functools import lru_cache
+from timeit import default_timer as timer
+
+import numpy as np
+
+import bitboard
+
+# the state of each puzzle after propagate()
+ACTIVE = 0
+SOLVED = 1
+UNSOLVABLE = 2
+STALLED = 3
+
+
+def candidates(sudokus: np.array, grid_width=9):
+    """
+    :param sudokus: a (B, N, N) array of sudokus
+    :return: their (B, N * N, N) candidates, where [b, i, n - 1] is True if number n
+    can still go in cell i of sudoku b. Givens only have their own number, and givens
+    outside 1..N have none.
+    """
+    cells = sudokus.reshape(sudokus.shape[0], grid_width * grid_width)
+    given = cells != 0
+    cands = np.ones(cells.shape + (grid_width,), dtype=bool)
+    cands[given] = np.arange(1, grid_width + 1) == cells[given][:, np.newaxis]
+    return cands
+
+
+def propagate(cands: np.array, grid_width=9, block_width=3):
+    """
+    Propagates naked and hidden singles through the candidates of every puzzle until
+    they are solved, found unsolvable, or stop making progress. Each pass works on the
+    puzzles still active only, compacting them as the others drop out.
+    Counting the candidates of every row, column and block, and spreading the counts
+    back to their cells, are both one matrix product with unit_matrix() over the whole
+    batch.
+    :param cands: the (B, N * N, N) candidates from candidates(). It is updated in
+    place.
+    :return: the state of each puzzle, SOLVED, UNSOLVABLE or STALLED
+    """
+    n_puzzles, n_cells, n = cands.shape
+    units = unit_matrix(grid_width, block_width)
+    states = np.full(n_puzzles, ACTIVE, dtype=np.uint8)
+    active = np.arange(n_puzzles)
+    # (puzzle, number, cell) floats, 1 for candidates, so every puzzle and number is a
+    # row of one big matrix
+    work = cands.transpose(0, 2, 1).astype(np.float32)
+    totals = work.sum(axis=(1, 2))
+    while active.shape[0]:
+        k = active.shape[0]
+        # naked singles: a cell with one candidate removes it from its row, column
+        # and block
+        counts = work.sum(axis=1)
+        unsolvable = (counts == 0).any(axis=1)
+        placed = work * (counts == 1)[:, np.newaxis, :]
+        placed = placed.reshape(k * n, n_cells)
+        in_units = placed @ units
+        # the same number placed twice in a unit
+        unsolvable |= (in_units > 1).reshape(k, -1).any(axis=1)
+        peers = in_units @ units.T - 3 * placed
+        work = work * (peers == 0).reshape(k, n, n_cells)
+        # hidden singles: a number with one place left in a unit goes there
+        in_units = work.reshape(k * n, n_cells) @ units
+        unsolvable |= (in_units == 0).reshape(k, -1).any(axis=1)
+        only_place = ((in_units == 1).astype(np.float32) @ units.T) > 0
+        forced = work * only_place.reshape(k, n, n_cells)
+        n_forced = forced.sum(axis=1)
+        # a cell that is the only place left for two numbers
+        unsolvable |= (n_forced > 1).any(axis=1)
+        work = np.where((n_forced > 0)[:, np.newaxis, :], forced, work)
+        new_totals = work.sum(axis=(1, 2))
+        states[active[unsolvable]] = UNSOLVABLE
+        solved = ~unsolvable & (new_totals == n_cells)
+        states[active[solved]] = SOLVED
+        stalled = ~unsolvable & ~solved & (new_totals == totals)
+        states[active[stalled]] = STALLED
+        done = unsolvable | solved | stalled
+        cands[active[done]] = work[done].transpose(0, 2, 1) > 0
+        keep = ~done
+        active, work, totals = active[keep], work[keep], new_totals[keep]
+    return states
+
+
+@lru_cache(maxsize=None)
+def unit_matrix(grid_width=9, block_width=3):
+    """
+    :return: the (N * N, 3 * N) float32 matrix whose [i, u] is 1 if cell i is in unit
+    u. Units 0..N-1 are the rows, N..2N-1 the columns and 2N..3N-1 the blocks.
+    """
+    cell_units, _ = bitboard.geometry(grid_width, block_width)
+    units = np.zeros((grid_width * grid_width, 3 * grid_width), dtype=np.float32)
+    for i, unit in enumerate(cell_units):
+        for kind, index in enumerate(unit):
+            units[i, kind * grid_width + index] = 1
+    return units
+
+
+def solve_batch(sudokus: np.array, grid_width=9, block_width=3):
+    """
+    Solves the sudokus by propagating singles through all of them at once, then
+    branching with bitboard.solve() on the ones propagation couldn't finish, starting
+    from what it filled in.
+    :param sudokus: a (B, N, N) array of sudokus
+    :return: a (completed_sudokus, solved, solving_time) tuple. completed_sudokus is
+    the (B, N, N) array of solutions and solved[b] is False if sudoku b has no
+    solution, in which case completed_sudokus[b] is all zeros.
+    """
+    start = timer()
+    n_puzzles = sudokus.shape[0]
+    cands = candidates(sudokus, grid_width)
+    states = propagate(cands, grid_width, block_width)
+    # the number in each cell that has only one candidate left, 0 elsewhere
+    single = cands.sum(axis=2) == 1
+    grids = np.where(single, cands.argmax(axis=2) + 1, 0)
+    for b in np.flatnonzero(states == STALLED):
+        grid = grids[b].tolist()
+        if bitboard.solve(grid, None, grid_width, block_width):
+            grids[b] = grid
+            states[b] = SOLVED
+        else:
+            states[b] = UNSOLVABLE
+    solved = states == SOLVED
+    grids[~solved] = 0
+    completed_sudokus = grids.reshape(n_puzzles, grid_width, grid_width)
+    return completed_sudokus.astype(sudokus.dtype), solved, timer() - start